@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark the time it takes to import drf_openapi modules.
+
+Every module is imported ``--repeat`` times, each in a fresh interpreter where Django is set up and the Django REST
+framework modules any API already loads are imported, so that only the cost added by drf_openapi is measured.
+Modules listed in ``--forbid`` must not be pulled in by these imports. The exit status is 1 when a module takes
+longer than ``--max-ms`` on median or imports a forbidden module
+
+    python benchmarks/import_time.py --max-ms 30
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ('drf_openapi.utils', 'drf_openapi.entities', 'drf_openapi.views', 'drf_openapi.urls')
+
+# Slow to import and only needed to render schemas
+FORBIDDEN = ('pkg_resources', 'rest_framework_swagger', 'openapi_codec')
+
+CHILD = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+import django
+from django.conf import settings
+settings.configure(
+    SECRET_KEY='benchmark',
+    INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes', 'rest_framework', 'drf_openapi'],
+    DATABASES={{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}}},
+)
+django.setup()
+import rest_framework.views, rest_framework.serializers, rest_framework.pagination, rest_framework.schemas
+
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'time_s': elapsed, 'imported': sorted(set(sys.modules) - before)}}))
+'''
+
+
+def import_module(module, env):
+    # Warnings of third-party packages compiled on the first run would clutter the report
+    command = [sys.executable, '-W', 'ignore::SyntaxWarning', '-c', CHILD.format(root=ROOT, module=module)]
+    output = subprocess.check_output(command, env=env)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def run(options):
+    env = dict(os.environ)
+    # Measure imports from bytecode, as installed packages are
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPYCACHEPREFIX'] = tempfile.mkdtemp(prefix='drf_openapi_import_time')
+
+    results = []
+    for module in options.modules:
+        import_module(module, env)
+        runs = [import_module(module, env) for _ in range(options.repeat)]
+        timings = [run['time_s'] for run in runs]
+        imported = runs[-1]['imported']
+        results.append({
+            'module': module,
+            'wall_time_s': timings,
+            'wall_time_median_s': statistics.median(timings),
+            'wall_time_min_s': min(timings),
+            'modules_imported': len(imported),
+            'forbidden_imported': sorted({
+                name for name in imported if name.split('.')[0] in options.forbid
+            }),
+        })
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=list(MODULES), help='Modules to import')
+    parser.add_argument('--repeat', type=int, default=5, help='Imports per module')
+    parser.add_argument('--max-ms', type=float, default=None, help='Median import time allowed per module')
+    parser.add_argument('--forbid', nargs='*', default=list(FORBIDDEN), help='Packages that must not be imported')
+    parser.add_argument('--output', default=None, help='File to write the JSON results to, defaults to stdout')
+    options = parser.parse_args(argv)
+
+    results = run(options)
+    failed = False
+    for result in results:
+        median_ms = result['wall_time_median_s'] * 1000
+        too_slow = options.max_ms is not None and median_ms > options.max_ms
+        failed = failed or too_slow or bool(result['forbidden_imported'])
+        sys.stderr.write('{:<24} {:>8.1f}ms {:>5} modules{}{}\n'.format(
+            result['module'], median_ms, result['modules_imported'],
+            '  SLOW' if too_slow else '',
+            '  imports {}'.format(', '.join(result['forbidden_imported'])) if result['forbidden_imported'] else '',
+        ))
+
+    output = json.dumps({
+        'benchmark': 'import_time',
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'parameters': {'repeat': options.repeat, 'max_ms': options.max_ms, 'forbid': options.forbid},
+        'results': results,
+    }, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark schema generation and encoding on a synthetic API.
+
+The API is made of ``--endpoints`` resources sharing ``--serializers`` versioned serializer families, each with
+``--fields`` scalar fields and a chain of ``--depth`` nested serializers. Every third resource is a paginated viewset,
+the others are API views declaring their serializers through ``view_config``.
+
+``OpenApiSchemaGenerator.get_schema`` and ``OpenAPICodec.encode`` are measured separately for every version:
+wall time over ``--repeat`` runs, then peak memory in a separate traced run. Cold runs start from empty process-wide
+caches, warm runs reuse them. Results are written as JSON and can be compared with those of another commit
+
+    python benchmarks/schema_generation.py --endpoints 500 --versions 3 --output before.json
+    python benchmarks/schema_generation.py --endpoints 500 --versions 3 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+URLCONF = 'drf_openapi_benchmark_urls'
+
+
+def setup_django(options):
+    import django
+    from django.conf import settings
+
+    settings.configure(
+        DEBUG=False,
+        SECRET_KEY='benchmark',
+        ROOT_URLCONF=URLCONF,
+        INSTALLED_APPS=[
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+            'rest_framework',
+            'drf_openapi',
+        ],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        REST_FRAMEWORK={'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning'},
+        DRF_OPENAPI={
+            'JSON_ENCODER': options.json_encoder,
+            'SCHEMA_COMPACT': options.compact,
+            'SCHEMA_PARALLEL_WORKERS': options.parallel,
+        },
+    )
+    django.setup()
+
+
+def build_serializer_family(module, index, versions, fields, depth):
+    """Return a `VersionedSerializers` with one serializer per version, each nesting ``depth`` serializers"""
+    from rest_framework import serializers
+    from drf_openapi.entities import VersionedSerializers
+
+    def make(name, attrs):
+        attrs['__module__'] = module.__name__
+        cls = type(name, (serializers.Serializer,), attrs)
+        setattr(module, name, cls)
+        return cls
+
+    version_map = []
+    for version in range(1, versions + 1):
+        nested = None
+        for level in range(depth, -1, -1):
+            attrs = {
+                'field_{}'.format(field): serializers.CharField(help_text='Field {}'.format(field))
+                if field % 3 else serializers.IntegerField(required=False)
+                for field in range(fields)
+            }
+            attrs['choice'] = serializers.ChoiceField(choices=[(str(c), 'Choice {}'.format(c)) for c in range(20)])
+            if version > 1:
+                attrs['added_in_v{}'.format(version)] = serializers.BooleanField()
+            if nested is not None:
+                attrs['child'] = nested()
+                attrs['children'] = nested(many=True)
+            nested = make('Family{}V{}Level{}Serializer'.format(index, version, level), attrs)
+
+        constraint = '>={}.0, <{}.0'.format(version, version + 1) if version < versions else '>={}.0'.format(version)
+        version_map.append((constraint, nested))
+
+    family = type('Family{}Serializer'.format(index), (VersionedSerializers,), {
+        '__module__': module.__name__,
+        '__doc__': 'Serializer family {}'.format(index),
+        'VERSION_MAP': tuple(version_map),
+    })
+    setattr(module, family.__name__, family)
+    return family
+
+
+def build_urlconf(endpoints, serializers_count, versions, fields, depth):
+    from django.conf.urls import include, url
+    from rest_framework import pagination, viewsets
+    from rest_framework.response import Response
+    from rest_framework.routers import SimpleRouter
+    from rest_framework.views import APIView
+    from drf_openapi.utils import view_config
+
+    module = types.ModuleType(URLCONF)
+    sys.modules[URLCONF] = module
+
+    families = [
+        build_serializer_family(module, index, versions, fields, depth)
+        for index in range(max(1, serializers_count))
+    ]
+
+    router = SimpleRouter()
+    urlpatterns = []
+    for index in range(endpoints):
+        family = families[index % len(families)]
+        if index % 3 == 2:
+            viewset = type('Resource{}ViewSet'.format(index), (viewsets.ViewSet,), {
+                '__module__': module.__name__,
+                'serializer_class': family.VERSION_MAP[-1][1],
+                'pagination_class': pagination.PageNumberPagination,
+                'list': lambda self, request, version=None: Response([]),
+                'retrieve': lambda self, request, pk=None, version=None: Response({}),
+            })
+            router.register('resource{}'.format(index), viewset, base_name='resource{}'.format(index))
+            continue
+
+        def get(self, request, version=None):
+            return Response({})
+
+        def post(self, request, version=None):
+            return Response({})
+
+        view = type('Resource{}View'.format(index), (APIView,), {
+            '__module__': module.__name__,
+            '__doc__': 'Resource {}'.format(index),
+            'get': view_config(response_serializer=family)(get),
+            'post': view_config(request_serializer=family, response_serializer=family)(post),
+        })
+        urlpatterns.append(url(r'^resource{}/$'.format(index), view.as_view()))
+
+    urlpatterns.extend(router.urls)
+    module.urlpatterns = [url(r'^v(?P<version>[0-9]+\.[0-9]+)/', include(urlpatterns))]
+    return module
+
+
+def measure(func, repeat, cold, setup=None):
+    """Measure ``func``, called with the result of ``setup`` if given, which is not measured"""
+    from drf_openapi.entities import clear_caches
+
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+
+    if cold:
+        clear_caches()
+    args = (setup(),) if setup else ()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {
+        'wall_time_s': timings,
+        'wall_time_median_s': statistics.median(timings),
+        'wall_time_min_s': min(timings),
+        'peak_memory_bytes': peak,
+    }
+
+
+def run(options):
+    from drf_openapi.codec import OpenAPICodec
+    from drf_openapi.entities import OpenApiSchemaGenerator
+
+    results = []
+    versions = ['{}.0'.format(v) for v in range(1, options.versions + 1)]
+    for version in versions:
+        def generate():
+            generator = OpenApiSchemaGenerator(version=version, url='https://api.example.com/', title='Benchmark')
+            return generator.get_schema(public=True)
+
+        for cold in (True, False):
+            document, generation = measure(generate, options.repeat, cold)
+            results.append(dict(generation, version=version, phase='get_schema', cold=cold))
+
+        # Operations are memoized on the links of a document, cold runs encode newly generated documents
+        for cold in (True, False):
+            if cold:
+                content, encoding = measure(OpenAPICodec().encode, options.repeat, cold=False, setup=generate)
+            else:
+                content, encoding = measure(lambda: OpenAPICodec().encode(document), options.repeat, cold=False)
+            results.append(dict(encoding, version=version, phase='encode', cold=cold, output_bytes=len(content)))
+
+    # Every version at once, sharing the work that does not depend on the version
+    def generate_all():
+        generator = OpenApiSchemaGenerator(version=versions[0], url='https://api.example.com/', title='Benchmark')
+        return generator.get_schemas(versions, public=True)
+
+    for cold in (True, False):
+        _, generation = measure(generate_all, options.repeat, cold)
+        results.append(dict(generation, version='all', phase='get_schemas', cold=cold))
+    return results
+
+
+def compare(results, baseline):
+    """Print the ratio of every measurement to the matching one of a previous run"""
+    previous = {
+        (result['version'], result['phase'], result.get('cold')): result for result in baseline['results']
+    }
+    for result in results:
+        match = previous.get((result['version'], result['phase'], result.get('cold')))
+        if match is None:
+            continue
+        sys.stderr.write('{:<8} {:<10} {:<5} time x{:.2f}  memory x{:.2f}\n'.format(
+            result['version'], result['phase'], 'cold' if result.get('cold') else '',
+            result['wall_time_median_s'] / match['wall_time_median_s'],
+            result['peak_memory_bytes'] / float(match['peak_memory_bytes'] or 1),
+        ))
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoints', type=int, default=200, help='Number of resources')
+    parser.add_argument('--serializers', type=int, default=None,
+                        help='Number of serializer families shared by the resources, defaults to endpoints / 4')
+    parser.add_argument('--versions', type=int, default=2, help='Number of API versions')
+    parser.add_argument('--fields', type=int, default=10, help='Scalar fields per serializer')
+    parser.add_argument('--depth', type=int, default=2, help='Nesting depth of serializers')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement')
+    parser.add_argument('--json-encoder', default='auto', help='JSON_ENCODER setting: auto, json, orjson or ujson')
+    parser.add_argument('--compact', action='store_true', help='Encode compact documents')
+    parser.add_argument('--parallel', type=int, default=0, help='Processes generating links, 0 for none')
+    parser.add_argument('--output', default=None, help='File to write the JSON results to, defaults to stdout')
+    parser.add_argument('--compare', default=None, help='JSON results of a previous run to compare against')
+    options = parser.parse_args(argv)
+    if options.serializers is None:
+        options.serializers = max(1, options.endpoints // 4)
+
+    setup_django(options)
+    build_urlconf(options.endpoints, options.serializers, options.versions, options.fields, options.depth)
+
+    import django
+    import rest_framework
+    import drf_openapi
+
+    report = {
+        'benchmark': 'schema_generation',
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'djangorestframework': rest_framework.VERSION,
+        'drf_openapi': drf_openapi.__version__,
+        'parameters': {
+            'endpoints': options.endpoints,
+            'serializers': options.serializers,
+            'versions': options.versions,
+            'fields': options.fields,
+            'depth': options.depth,
+            'repeat': options.repeat,
+            'json_encoder': options.json_encoder,
+            'compact': options.compact,
+            'parallel': options.parallel,
+        },
+        'results': run(options),
+    }
+
+    if options.compare:
+        with open(options.compare) as f:
+            compare(report['results'], json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,3 +2,5 @@
 __author__ = """Lim H."""
 __email__ = 'limdauto@gmail.com'
 __version__ = '1.3.0'
+
+default_app_config = 'drf_openapi.apps.Config'
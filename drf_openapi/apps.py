@@ -1,9 +1,57 @@
 # coding=utf-8
+import os
+import sys
+import threading
+
 from django.apps import AppConfig
 
 
+def get_management_command(argv=None):
+    """Return the name of the management command the process runs, ``None`` when it does not run one"""
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2:
+        return None
+    program = os.path.basename(argv[0])
+    if program in ('manage.py', 'django-admin', 'django-admin.py') or argv[0].endswith(
+            os.path.join('django', '__main__.py')):
+        return argv[1]
+    return None
+
+
+def is_serving_process(argv=None):
+    """
+    Return whether the process serves requests: it runs no management command, or one of ``SCHEMA_WARMUP_COMMANDS``.
+    The file watcher of ``runserver`` does not, only the server process it restarts on every change does.
+    """
+    from drf_openapi.settings import openapi_settings
+
+    argv = sys.argv if argv is None else argv
+    command = get_management_command(argv)
+    if command is None:
+        return True
+    if command not in openapi_settings.SCHEMA_WARMUP_COMMANDS:
+        return False
+    if command == 'runserver' and '--noreload' not in argv:
+        return os.environ.get('RUN_MAIN') == 'true'
+    return True
+
+
 class Config(AppConfig):
     name = 'drf_openapi'
     label = 'drf_openapi'
     verbose_name = 'DRF OpenAPI Schema'
 
+    def ready(self):
+        from drf_openapi.settings import openapi_settings
+
+        versions = openapi_settings.SCHEMA_WARMUP_VERSIONS
+        if not versions or not is_serving_process():
+            return
+
+        from drf_openapi.views import warm_up_schemas
+        if openapi_settings.SCHEMA_WARMUP_BACKGROUND:
+            threading.Thread(
+                target=warm_up_schemas, args=(versions,), name='drf_openapi_warmup', daemon=True).start()
+        else:
+            # Run in the master of preforking servers, workers then share the schemas
+            warm_up_schemas(versions)
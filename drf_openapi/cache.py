@@ -0,0 +1,348 @@
+# coding=utf-8
+"""Process-wide cache of generated schemas, and cache of encoded schemas shared by processes.
+
+Schemas are keyed by ``(version, public, title, url, permissions, fingerprint)`` where the permissions are a digest
+of the endpoints the user may access, ``None`` for public views, and the fingerprint identifies the urlconf, the deploy
+and the settings the schema was generated with.
+"""
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import connections
+
+from drf_openapi import __version__
+from drf_openapi.settings import openapi_settings
+from drf_openapi.storage import get_compressor
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaCacheEntry:
+    """A generated document along with its lazily encoded, and compressed, representations"""
+
+    def __init__(self, document, timeout=None, stale=0):
+        self.document = document
+        self.created = time.time()
+        self.expires = None if timeout is None else self.created + timeout
+        # Until then the expired entry may still be served while it is regenerated
+        self.stale_until = None if timeout is None else self.expires + stale
+        self._encoded = None
+        self._compressed = {}
+        self._lock = threading.Lock()
+        self.etag = None
+
+    @property
+    def last_modified(self):
+        return int(self.created)
+
+    def is_expired(self, now=None):
+        if self.expires is None:
+            return False
+        return (now or time.time()) >= self.expires
+
+    def is_dead(self, now=None):
+        if self.stale_until is None:
+            return False
+        return (now or time.time()) >= self.stale_until
+
+    def get_encoded(self, encode):
+        """Return the encoded document, calling ``encode(document)`` the first time only.
+        The strong ``etag`` of the entry is derived from the encoded content.
+        """
+        if self._encoded is None:
+            with self._lock:
+                if self._encoded is None:
+                    encoded = encode(self.document)
+                    self.etag = '"{}"'.format(hashlib.sha1(encoded).hexdigest())
+                    self._encoded = encoded
+        return self._encoded
+
+    def get_compressed(self, encoding):
+        """Return the encoded document compressed with the content coding, along with the etag of this variant.
+        Every variant is compressed the first time only, once the document is encoded.
+        """
+        variant = self._compressed.get(encoding)
+        if variant is None:
+            with self._lock:
+                variant = self._compressed.get(encoding)
+                if variant is None:
+                    content = get_compressor(encoding)(self._encoded)
+                    variant = self._compressed[encoding] = (content, '"{}-{}"'.format(self.etag.strip('"'), encoding))
+        return variant
+
+
+class SchemaBuild:
+    """A document being generated by one thread, which other threads wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.entry
+
+
+class SchemaCache:
+    """Entries are bounded by ``SCHEMA_CACHE_MAX_ENTRIES``, the least recently used ones are dropped first"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._builds = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._get(key)
+        return None if entry is None or entry.is_expired() else entry
+
+    def _get(self, key):
+        """Return the entry of the key, expired or not, dropping it once it can no longer be served"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.is_dead():
+            del self._entries[key]
+            entry = None
+        elif entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _set(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        max_entries = openapi_settings.SCHEMA_CACHE_MAX_ENTRIES
+        while max_entries and len(self._entries) > max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, key, document, timeout=None):
+        entry = SchemaCacheEntry(document, timeout)
+        with self._lock:
+            self._set(key, entry)
+        return entry
+
+    def get_or_set(self, key, generate, timeout=None, stale=0, refresh=None, serve_stale=True):
+        """
+        Return the entry of the key and whether it is a ``'hit'``, a ``'miss'`` or ``'stale'``.
+
+        On a miss, ``generate()`` builds the document in the calling thread while concurrent calls for the same key
+        wait for it and share its entry, or its exception. New entries can be served for ``stale`` seconds after
+        they expire: they are returned as is while ``refresh()`` regenerates them in the background, or not at all
+        without ``refresh``. Unless ``serve_stale``, expired entries are generated again like missing ones.
+        A document whose build started before an invalidation is returned but not cached.
+        """
+        with self._lock:
+            entry = self._get(key)
+            if entry is not None and not entry.is_expired():
+                return entry, 'hit'
+            if not serve_stale:
+                entry = None
+            build = self._builds.get(key)
+            if entry is not None and (build is not None or refresh is None):
+                return entry, 'stale'
+            if build is None:
+                build = self._builds[key] = SchemaBuild()
+                generation = self._generation
+            else:
+                generation = None
+
+        if generation is None:
+            return build.wait(), 'hit'
+
+        if entry is not None:
+            submit_refresh(self._build, key, build, generation, refresh, timeout, stale)
+            return entry, 'stale'
+        return self._build(key, build, generation, generate, timeout, stale), 'miss'
+
+    def _build(self, key, build, generation, generate, timeout, stale):
+        try:
+            build.entry = SchemaCacheEntry(generate(), timeout, stale)
+        except BaseException as exc:
+            build.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._builds.get(key) is build:
+                    del self._builds[key]
+                if build.entry is not None and generation == self._generation:
+                    self._set(key, build.entry)
+            build.done.set()
+        return build.entry
+
+    def invalidate(self, version=None):
+        """Drop cached schemas of the given version, or all of them"""
+        with self._lock:
+            self._generation += 1
+            if version is None:
+                self._builds.clear()
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == version]:
+                del self._entries[key]
+            for key in [key for key in self._builds if key[0] == version]:
+                del self._builds[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+schema_cache = SchemaCache()
+
+
+class SharedSchemaCache:
+    """
+    Encoded OpenAPI documents stored in a Django cache, as dictionaries of their ``content``, ``etag`` and
+    ``last_modified``, so that one process generates a schema for every process sharing the cache.
+    Keys include generations stored in the cache too, for every version and for all of them, which
+    `invalidate` replaces so that every process stops reading the documents of previous generations.
+    """
+
+    key_prefix = 'drf_openapi:schema:'
+    # Seconds a process may hold the lock of a key while generating its schema, and others wait for it
+    lock_timeout = 60
+    poll_interval = 0.1
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def make_key(self, key):
+        generations = self.get_generations(key[0])
+        return self.key_prefix + hashlib.sha1(repr((key, generations)).encode('utf-8')).hexdigest()
+
+    def get_generation_keys(self, version):
+        return self.key_prefix + 'generation', self.key_prefix + 'generation:{}'.format(version)
+
+    def get_generations(self, version):
+        generation_keys = self.get_generation_keys(version)
+        generations = self.cache.get_many(generation_keys)
+        for generation_key in generation_keys:
+            if generation_key not in generations:
+                # Generations are random, an evicted one never brings back the documents of an older one
+                self.cache.add(generation_key, uuid.uuid4().hex, None)
+                generations[generation_key] = self.cache.get(generation_key)
+        return tuple(generations[generation_key] for generation_key in generation_keys)
+
+    def invalidate(self, version=None):
+        """Stop serving the documents of the version, or of every version, to every process"""
+        generation_key = self.get_generation_keys(version)[0 if version is None else 1]
+        self.cache.set(generation_key, uuid.uuid4().hex, None)
+
+    def get_or_set(self, key, generate, timeout=None):
+        """
+        Return the encoded schema of the key and whether it is a ``'hit'`` or a ``'miss'``. On a miss, the process
+        acquiring the lock of the key calls ``generate()`` while the others poll the cache until it is stored.
+        Nothing is stored when ``generate()`` returns ``None``.
+        """
+        cache_key = self.make_key(key)
+        value = self.cache.get(cache_key)
+        if value is not None:
+            return value, 'hit'
+
+        lock_key = cache_key + ':lock'
+        deadline = time.time() + self.lock_timeout
+        locked = self.cache.add(lock_key, True, self.lock_timeout)
+        while not locked and time.time() < deadline:
+            time.sleep(self.poll_interval)
+            value = self.cache.get(cache_key)
+            if value is not None:
+                return value, 'hit'
+            locked = self.cache.add(lock_key, True, self.lock_timeout)
+
+        # Past the deadline the holder of the lock is presumed dead, and the schema generated regardless
+        try:
+            value = generate()
+            if value is not None:
+                self.cache.set(cache_key, value, timeout)
+        finally:
+            if locked:
+                self.cache.delete(lock_key)
+        return value, 'miss'
+
+
+def get_shared_schema_cache():
+    """Return the shared cache configured by ``SCHEMA_SHARED_CACHE``, or ``None`` when it is not"""
+    alias = openapi_settings.SCHEMA_SHARED_CACHE
+    if not alias or openapi_settings.SCHEMA_CACHE_TIMEOUT == 0:
+        return None
+    return SharedSchemaCache(alias)
+
+
+_refresh_executor = None
+_refresh_workers = None
+_refresh_executor_lock = threading.Lock()
+
+
+def submit_refresh(func, *args):
+    """Call ``func(*args)`` in the thread pool regenerating expired schemas, sized by ``SCHEMA_REFRESH_WORKERS``"""
+    global _refresh_executor, _refresh_workers
+    workers = max(1, openapi_settings.SCHEMA_REFRESH_WORKERS)
+    with _refresh_executor_lock:
+        if _refresh_executor is None or _refresh_workers != workers:
+            if _refresh_executor is not None:
+                _refresh_executor.shutdown(wait=False)
+            _refresh_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='drf_openapi_refresh')
+            _refresh_workers = workers
+        return _refresh_executor.submit(_run_refresh, func, *args)
+
+
+def _run_refresh(func, *args):
+    try:
+        return func(*args)
+    except Exception:
+        logger.exception('Could not regenerate the schema, the stale one is served until it is gone')
+    finally:
+        # Connections opened by the worker thread would otherwise stay open until the process exits
+        connections.close_all()
+
+
+_fingerprints = {}
+
+
+def get_schema_fingerprint(urlconf=None):
+    """Return a digest of the urlconf, deploy and settings a schema is generated with"""
+    urlconf = urlconf or settings.ROOT_URLCONF
+    if not isinstance(urlconf, str):
+        urlconf = getattr(urlconf, '__name__', repr(urlconf))
+
+    fingerprint = _fingerprints.get(urlconf)
+    if fingerprint is None:
+        parts = (
+            __version__,
+            urlconf,
+            openapi_settings.DEPLOY_FINGERPRINT,
+            sorted(getattr(settings, 'DRF_OPENAPI', {}).items()),
+            sorted(getattr(settings, 'SWAGGER_SETTINGS', {}).items()),
+        )
+        fingerprint = _fingerprints[urlconf] = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return fingerprint
+
+
+def invalidate_schema_cache(version=None, shared=True):
+    """
+    Drop cached schemas so that they are regenerated on next access, along with those of the shared cache
+    unless ``shared`` is false
+    """
+    _fingerprints.clear()
+    schema_cache.invalidate(version)
+    shared_cache = get_shared_schema_cache() if shared else None
+    if shared_cache is not None:
+        shared_cache.invalidate(version)
+
+
+def clear_schema_cache_on_setting_change(*args, **kwargs):
+    # Shared documents are keyed by the fingerprint of these settings already
+    if kwargs['setting'] in ('DRF_OPENAPI', 'SWAGGER_SETTINGS', 'ROOT_URLCONF'):
+        invalidate_schema_cache(shared=False)
+
+
+setting_changed.connect(clear_schema_cache_on_setting_change)
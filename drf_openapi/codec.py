@@ -3,104 +3,110 @@
 and https://github.com/marcgibbons/django-rest-swagger/blob/master/rest_framework_swagger/renderers.py
 """
 import json
+import logging
 from collections import OrderedDict
+from functools import lru_cache
+from importlib import import_module
 
 import coreschema
-from coreapi import Document
+from coreapi import Document, Link, Object
 from coreapi.compat import urlparse, force_bytes
+from django.core.exceptions import ImproperlyConfigured
 from openapi_codec import OpenAPICodec as _OpenAPICodec
-from openapi_codec.encode import _get_links, _get_field_description
-from openapi_codec.utils import get_method, get_encoding, get_location
+from openapi_codec.encode import _add_tag_prefix, _get_field_description
+from openapi_codec.utils import get_method, get_encoding, get_location, link_sorting_key
 from rest_framework import status
 from rest_framework.renderers import JSONRenderer
 from rest_framework_swagger.renderers import OpenAPIRenderer as _OpenAPIRenderer, \
     SwaggerUIRenderer as _SwaggerUIRenderer
 
+from drf_openapi.settings import openapi_settings
+from drf_openapi.signals import schema_encoded
+from drf_openapi.stats import SchemaBuildStats
+
+logger = logging.getLogger(__name__)
+
 
 class OpenApiFieldParser:
 
-    def __init__(self, link, field):
+    def __init__(self, link, field, compact=False):
+        self.compact = compact
         self.field = field
-        self.field_description = _get_field_description(field)
         self.field_type = _get_field_type(field)
         self.location = get_location(link, field)
 
+    @property
+    def field_description(self):
+        return _get_field_description(self.field)
+
     @property
     def location_string(self):
         return 'formData' if self.location == 'form' else self.location
 
     def parse_array_field(self):
-        parameter = {
-            'name': self.field.name,
-            'required': self.field.required,
-            'description': self.field_description,
-            'type': self.field_type,
-        }
+        return _get_array_parameter(self.field, self.compact)
 
-        items_type = _get_field_type(self.field.schema.items)
-        if items_type == 'object':
-            parameter['items'] = {
-                'type': items_type,
-                'properties': {
-                    name: {
-                        'description': _get_field_description(prop),
-                        'type': _get_field_type(prop)
-                    } for name, prop in self.field.schema.items.properties.items()
-                }
-            }
-        else:
-            parameter['items'] = {
-                'type': items_type,
-                'description': _get_field_description(self.field.schema.items)
-            }
+    def as_parameter(self):
+        return _get_parameter(self.field, self.field_type, self.location, self.compact)
 
-        return parameter
+    def as_body_parameter(self, encoding):
+        return _get_body_parameter(self.field, self.field_type, self.location, encoding, self.compact)
 
-    def as_parameter(self):
-        if self.field_type == 'array':
-            param = self.parse_array_field()
-        else:
-            param = {
-                'name': self.field.name,
-                'required': self.field.required,
-                'description': self.field_description,
-                'type': self.field_type
-            }
+    def as_schema_property(self):
+        return _get_schema_property(self.field, self.field_type, self.compact)
 
-        param['in'] = self.location_string
-        return param
 
-    def as_body_parameter(self, encoding):
-        if encoding == 'application/octet-stream':
-            # https://github.com/OAI/OpenAPI-Specification/issues/50#issuecomment-112063782
-            schema = {'type': 'string', 'format': 'binary'}
-        else:
-            schema = {}
+class OpenAPICodec(_OpenAPICodec):
+    def encode(self, document, extra=None, stats=None, compact=None, **options):
+        """
+        Encode the document with the ``JSON_ENCODER`` setting. ``compact``, defaulting to the ``SCHEMA_COMPACT``
+        setting, drops empty descriptions and summaries repeating the URL and minifies the output.
+        """
+        if not isinstance(document, Document):
+            raise TypeError('Expected a `coreapi.Document` instance')
 
-        param = self.as_parameter()
-        param['schema'] = schema
-        return param
+        if compact is None:
+            compact = openapi_settings.SCHEMA_COMPACT
+        dumps, _ = get_json_encoder(openapi_settings.JSON_ENCODER, compact)
 
-    def as_schema_property(self):
-        if self.field_type == 'array':
-            return self.parse_array_field()
+        stats = stats or SchemaBuildStats()
+        with stats.timer('encode'):
+            data = _generate_openapi_object(document, compact=compact)
+            if isinstance(extra, dict):
+                data.update(extra)
 
-        return {
-            'description': self.field_description,
-            'type': self.field_type,
-        }
+            content = dumps(data)
 
+        stats.count('bytes_encoded', len(content))
+        logger.debug('Encoded schema: %s', stats)
+        schema_encoded.send(sender=self.__class__, document=document, stats=stats)
+        return content
 
-class OpenAPICodec(_OpenAPICodec):
-    def encode(self, document, extra=None, **options):
+    def iter_encode(self, document, extra=None, stats=None, compact=None, **options):
+        """Encode the document chunk by chunk, generating the ``paths`` section one operation at a time.
+        The concatenated chunks are identical to the output of ``encode``. ``stats`` are recorded, and
+        ``schema_encoded`` sent, as the chunks are consumed.
+        """
         if not isinstance(document, Document):
             raise TypeError('Expected a `coreapi.Document` instance')
 
-        data = _generate_openapi_object(document)
-        if isinstance(extra, dict):
-            data.update(extra)
+        if compact is None:
+            compact = openapi_settings.SCHEMA_COMPACT
+        encoder = get_json_encoder(openapi_settings.JSON_ENCODER, compact)
 
-        return force_bytes(json.dumps(data))
+        stats = stats or SchemaBuildStats()
+        chunks = _iter_openapi_object(document, extra, encoder, compact)
+        while True:
+            # Only the time spent encoding counts, not the time the consumer spends on each chunk
+            with stats.timer('encode'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            stats.count('bytes_encoded', len(chunk))
+            yield chunk
+
+        logger.debug('Encoded schema: %s', stats)
+        schema_encoded.send(sender=self.__class__, document=document, stats=stats)
 
 
 class OpenAPIRenderer(_OpenAPIRenderer):
@@ -108,16 +114,64 @@ class OpenAPIRenderer(_OpenAPIRenderer):
     def render(self, data, accepted_media_type=None, renderer_context=None):
         if renderer_context['response'].status_code != status.HTTP_200_OK:
             return JSONRenderer().render(data)
-        extra = self.get_customizations()
 
-        return OpenAPICodec().encode(data, extra=extra)
+        # Schema views hand over their cache entry so that the document is encoded once per entry
+        entry = renderer_context.get('schema_entry')
+        if entry is not None and entry.document is data:
+            return entry.get_encoded(self.encode)
+
+        return self.encode(data)
+
+    def encode(self, document, stats=None):
+        return OpenAPICodec().encode(document, extra=self.get_customizations(), stats=stats)
+
+    def iter_encode(self, document, stats=None):
+        return OpenAPICodec().iter_encode(document, extra=self.get_customizations(), stats=stats)
+
+
+# Libraries tried in turn by the ``auto`` JSON encoder
+JSON_ENCODERS = ('orjson', 'ujson', 'json')
+
+
+@lru_cache(maxsize=None)
+def get_json_encoder(name, compact=False):
+    """
+    Return a function encoding data to JSON bytes with the named library, along with the item and key separators
+    it emits. ``auto`` picks the first of `JSON_ENCODERS` installed. Libraries other than `json` always minify.
+    """
+    names = JSON_ENCODERS if name == 'auto' else (name,)
+    for name in names:
+        if name == 'json':
+            if compact:
+                encoder = json.JSONEncoder(separators=(',', ':'))
+                return lambda data: force_bytes(encoder.encode(data)), (b',', b':')
+            return lambda data: force_bytes(json.dumps(data)), (b', ', b': ')
+
+        if name not in ('orjson', 'ujson'):
+            raise ImproperlyConfigured('Unknown JSON encoder: {}'.format(name))
+        try:
+            module = import_module(name)
+        except ImportError:
+            if len(names) == 1:
+                raise ImproperlyConfigured('JSON encoder {} is not installed'.format(name))
+            continue
+
+        if name == 'orjson':
+            # Responses are keyed by integer status codes
+            option = module.OPT_NON_STR_KEYS
+            return lambda data: module.dumps(data, option=option), (b',', b':')
+        return lambda data: force_bytes(module.dumps(data, escape_forward_slashes=False)), (b',', b':')
 
 
 class SwaggerUIRenderer(_SwaggerUIRenderer):
     template = 'drf_openapi/index.html'
 
 
-def _generate_openapi_object(document):
+# Placeholder for the ``paths`` section of documents encoded by ``OpenAPICodec.iter_encode``
+_STREAMED = object()
+
+
+def _generate_openapi_object(document, paths=None, compact=False):
     """
     Generates root of the Swagger spec.
     """
@@ -128,7 +182,8 @@ def _generate_openapi_object(document):
     swagger['swagger'] = '2.0'
     swagger['info'] = OrderedDict()
     swagger['info']['title'] = document.title
-    swagger['info']['description'] = document.description
+    if document.description or not compact:
+        swagger['info']['description'] = document.description
     swagger['info']['version'] = document.version
 
     if parsed_url.netloc:
@@ -136,47 +191,169 @@ def _generate_openapi_object(document):
     if parsed_url.scheme:
         swagger['schemes'] = [parsed_url.scheme]
 
-    swagger['paths'] = _get_paths_object(document)
+    swagger['paths'] = _get_paths_object(document, compact) if paths is None else paths
+
+    definitions = getattr(document, 'definitions', None)
+    if definitions:
+        # Definitions are shared by the documents of a version, drop descriptions from a copy
+        swagger['definitions'] = _drop_empty_descriptions(definitions) if compact else definitions
 
     return swagger
 
 
-def _get_paths_object(document):
-    paths = OrderedDict()
+def _get_links(document):
+    """
+    Returns ``(operation_id, link, tags)`` of every link of the document, like ``openapi_codec`` does,
+    walking the document once and sorting the links once.
+    """
+    document_links = []
+    _collect_links(document, (), document_links)
+    document_links.sort(key=link_sorting_key)
+
+    links = []
+    for keys, link in document_links:
+        if len(keys) > 1:
+            links.append(('_'.join(keys[1:]), link, [keys[0]]))
+        else:
+            links.append((keys[0], link, []))
+
+    # If the operation ids are not unique, then prefix them with the tag.
+    if len({operation_id for operation_id, _, _ in links}) != len(links):
+        return [_add_tag_prefix(item) for item in links]
+    return links
+
+
+def _collect_links(node, keys, links):
+    items = list(node.items())
+    for key, value in items:
+        if isinstance(value, Link):
+            links.append((keys + (key,), value))
+    for key, value in items:
+        if isinstance(value, Object):
+            _collect_links(value, keys + (key,), links)
+
+
+def _get_path_links(document):
+    """
+    Groups the links of the document by URL and method, keeping the first seen order.
+    """
+    path_links = OrderedDict()
+
+    for operation_id, link, tags in _get_links(document):
+        if link.url not in path_links:
+            path_links[link.url] = OrderedDict()
+
+        path_links[link.url][get_method(link)] = (operation_id, link, tags)
 
-    links = _get_links(document)
+    return path_links
 
-    for operation_id, link, tags in links:
-        if link.url not in paths:
-            paths[link.url] = OrderedDict()
 
-        method = get_method(link)
-        operation = _get_operation(operation_id, link, tags)
-        paths[link.url].update({method: operation})
+def _get_paths_object(document, compact=False):
+    paths = OrderedDict()
+
+    for url, method_links in _get_path_links(document).items():
+        paths[url] = OrderedDict()
+        for method, (operation_id, link, tags) in method_links.items():
+            paths[url][method] = _get_operation(operation_id, link, tags, compact)
 
     return paths
 
 
-def _get_operation(operation_id, link, tags):
+def _iter_openapi_object(document, extra, encoder, compact=False):
+    """
+    Yields the JSON of the OpenAPI object in chunks, those of its paths holding one operation each.
+    """
+    dumps, (item_separator, key_separator) = encoder
+    data = _generate_openapi_object(document, paths=_STREAMED, compact=compact)
+    if isinstance(extra, dict):
+        data.update(extra)
+
+    separator = b'{'
+    for key, value in data.items():
+        yield separator + dumps(key) + key_separator
+        separator = item_separator
+        if value is _STREAMED:
+            for chunk in _iter_paths_object(document, encoder, compact):
+                yield chunk
+        else:
+            yield dumps(value)
+    yield b'}'
+
+
+def _iter_paths_object(document, encoder, compact=False):
+    """
+    Yields the JSON of the paths object in chunks holding one operation each.
+    """
+    dumps, (item_separator, key_separator) = encoder
+    path_links = _get_path_links(document)
+    if not path_links:
+        yield b'{}'
+        return
+
+    path_separator = b'{'
+    for url, method_links in path_links.items():
+        yield path_separator + dumps(url) + key_separator
+        path_separator = item_separator
+
+        method_separator = b'{'
+        for method, (operation_id, link, tags) in method_links.items():
+            operation = _get_operation(operation_id, link, tags, compact)
+            yield method_separator + dumps(method) + key_separator + dumps(operation)
+            method_separator = item_separator
+        yield b'}'
+    yield b'}'
+
+
+def _drop_empty_descriptions(value):
+    """
+    Return a copy of the data without empty ``description`` keys
+    """
+    if isinstance(value, dict):
+        return value.__class__(
+            (key, _drop_empty_descriptions(item)) for key, item in value.items()
+            if not (key == 'description' and (item is None or item == ''))
+        )
+    if isinstance(value, list):
+        return [_drop_empty_descriptions(item) for item in value]
+    return value
+
+
+def _get_operation(operation_id, link, tags, compact=False):
+    operation = {'operationId': operation_id}
+    operation.update(_get_link_operation(link, compact))
+    if tags:
+        operation['tags'] = tags
+    return operation
+
+
+def _get_link_operation(link, compact=False):
+    """
+    Returns the parts of the operation of a link that do not depend on the document it belongs to.
+    They are memoized on the link, which generators share across the documents of a version.
+    """
+    operations = getattr(link, '_openapi_operations', None)
+    if operations is None:
+        operations = link._openapi_operations = {}
+    if compact in operations:
+        return operations[compact]
+
     encoding = get_encoding(link)
     description = link.description.strip()
     # summary = description.splitlines()[0] if description else None
     summary = link.url
 
     operation = {
-        'operationId': operation_id,
         'responses': _get_responses(link),
-        'parameters': _get_parameters(link, encoding)
+        'parameters': _get_parameters(link, encoding, compact)
     }
 
     if description:
         operation['description'] = description
-    if summary:
+    if summary and not (compact and summary == link.url):
         operation['summary'] = summary
     if encoding:
         operation['consumes'] = [encoding]
-    if tags:
-        operation['tags'] = tags
+    operations[compact] = operation
     return operation
 
 
@@ -190,30 +367,104 @@ def _get_responses(link):
     return res
 
 
-def _get_field_type(field):
-    type_name_map = {
-        coreschema.String: 'string',
-        coreschema.Integer: 'integer',
-        coreschema.Number: 'number',
-        coreschema.Boolean: 'boolean',
-        coreschema.Array: 'array',
-        coreschema.Object: 'object',
-    }
+FIELD_TYPES = {
+    coreschema.String: 'string',
+    coreschema.Integer: 'integer',
+    coreschema.Number: 'number',
+    coreschema.Boolean: 'boolean',
+    coreschema.Array: 'array',
+    coreschema.Object: 'object',
+}
 
+
+def _get_field_type(field):
     if getattr(field, 'type', None) is not None:
         # Deprecated
         return field.type
 
-    if field.__class__ in type_name_map:
-        return type_name_map[field.__class__]
+    field_type = FIELD_TYPES.get(field.__class__)
+    if field_type is not None:
+        return field_type
 
-    if getattr(field, 'schema', None) is None:
+    schema = getattr(field, 'schema', None)
+    if schema is None:
         return 'string'
 
-    return type_name_map.get(field.schema.__class__, 'string')
+    return FIELD_TYPES.get(schema.__class__, 'string')
+
+
+def _drop_empty_description(obj, compact):
+    if compact and obj['description'] in (None, ''):
+        del obj['description']
+    return obj
+
+
+def _get_array_parameter(field, compact=False):
+    parameter = {
+        'name': field.name,
+        'required': field.required,
+        'description': _get_field_description(field),
+        'type': 'array',
+    }
+
+    items_type = _get_field_type(field.schema.items)
+    if items_type == 'object':
+        parameter['items'] = {
+            'type': items_type,
+            'properties': {
+                name: _drop_empty_description({
+                    'description': _get_field_description(prop),
+                    'type': _get_field_type(prop)
+                }, compact) for name, prop in field.schema.items.properties.items()
+            }
+        }
+    else:
+        parameter['items'] = _drop_empty_description({
+            'type': items_type,
+            'description': _get_field_description(field.schema.items)
+        }, compact)
+
+    return _drop_empty_description(parameter, compact)
+
+
+def _get_parameter(field, field_type, location, compact=False):
+    if field_type == 'array':
+        parameter = _get_array_parameter(field, compact)
+    else:
+        parameter = _drop_empty_description({
+            'name': field.name,
+            'required': field.required,
+            'description': _get_field_description(field),
+            'type': field_type
+        }, compact)
+
+    parameter['in'] = 'formData' if location == 'form' else location
+    return parameter
+
+
+def _get_body_parameter(field, field_type, location, encoding, compact=False):
+    if encoding == 'application/octet-stream':
+        # https://github.com/OAI/OpenAPI-Specification/issues/50#issuecomment-112063782
+        schema = {'type': 'string', 'format': 'binary'}
+    else:
+        schema = {}
+
+    parameter = _get_parameter(field, field_type, location, compact)
+    parameter['schema'] = schema
+    return parameter
+
+
+def _get_schema_property(field, field_type, compact=False):
+    if field_type == 'array':
+        return _get_array_parameter(field, compact)
+
+    return _drop_empty_description({
+        'description': _get_field_description(field),
+        'type': field_type,
+    }, compact)
 
 
-def _get_parameters(link, encoding):
+def _get_parameters(link, encoding, compact=False):
     """
     Generates Swagger Parameter Item object.
     """
@@ -221,22 +472,24 @@ def _get_parameters(link, encoding):
     properties = {}
     required = []
 
+    default_location = 'query' if get_method(link) in ('get', 'delete') else 'form'
     for field in link.fields:
-        parser = OpenApiFieldParser(link, field)
-        if parser.location == 'form':
+        location = field.location or default_location
+        field_type = _get_field_type(field)
+        if location == 'form':
             if encoding in ('multipart/form-data', 'application/x-www-form-urlencoded'):
                 # 'formData' in swagger MUST be one of these media types.
-                parameters.append(parser.as_parameter())
+                parameters.append(_get_parameter(field, field_type, location, compact))
             else:
                 # Expand coreapi fields with location='form' into a single swagger
                 # parameter, with a schema containing multiple properties.
-                properties[field.name] = parser.as_schema_property()
+                properties[field.name] = _get_schema_property(field, field_type, compact)
                 if field.required:
                     required.append(field.name)
-        elif parser.location == 'body':
-            parameters.append(parser.as_body_parameter(encoding))
+        elif location == 'body':
+            parameters.append(_get_body_parameter(field, field_type, location, encoding, compact))
         else:
-            parameters.append(parser.as_parameter())
+            parameters.append(_get_parameter(field, field_type, location, compact))
 
     if properties:
         parameter = {
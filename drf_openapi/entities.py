@@ -1,14 +1,20 @@
 # coding=utf-8
+import hashlib
+import logging
 import operator
-from collections import OrderedDict
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from threading import Lock
+from weakref import WeakKeyDictionary, WeakSet
 
 import coreschema
 import uritemplate
 from coreapi import Link, Document, Field
 from coreapi.compat import force_text
 from django.db import models
+from django.urls import get_resolver
 from django.utils.functional import Promise
-from pkg_resources import parse_version
 from rest_framework import serializers
 from rest_framework.fields import IntegerField, URLField
 from rest_framework.pagination import PageNumberPagination, LimitOffsetPagination, CursorPagination
@@ -16,7 +22,14 @@ from rest_framework.schemas import SchemaGenerator
 from rest_framework.schemas.generators import insert_into, distribute_links, LinkNode
 from rest_framework.schemas.inspectors import get_pk_description, field_to_schema
 
-from drf_openapi.codec import _get_parameters
+from drf_openapi import parallel
+from drf_openapi.link_cache import get_link_cache, get_endpoint_fingerprint, get_class_path, clear_link_caches
+from drf_openapi.settings import openapi_settings
+from drf_openapi.signals import schema_generated
+from drf_openapi.stats import SchemaBuildStats
+from drf_openapi.versions import parse_version
+
+logger = logging.getLogger(__name__)
 
 
 class VersionedSerializers:
@@ -54,46 +67,228 @@ class VersionedSerializers:
 
     @classmethod
     def get(cls, request_version):
-        for allowed_version, schema in cls.VERSION_MAP:
-            distinct_versions = [version.strip() for version in allowed_version.split(',')]
-            matched = True
-            for distinct_version in distinct_versions:
-                operation = cls.OPERATORS.get(distinct_version[:2])
-                if operation:
-                    # prepare cases #2, #5, #6
-                    compare_with = distinct_version[2:]
-                else:
-                    operation = cls.OPERATORS.get(distinct_version[0])
-                    if operation:
-                        # prepare cases #3, #4
-                        compare_with = distinct_version[1:]
-                    else:
-                        # prepare case #1
-                        compare_with = distinct_version
-                        operation = cls.OPERATORS['==']
-
-                matched = operation(parse_version(request_version), parse_version(compare_with))
-                if not matched:
-                    matched = False
-
-            if matched:
+        return cls.get_compiled_version_map().resolve(request_version)
+    get.__func__.__annotations__ = {'request_version': str}
+
+    @classmethod
+    def get_compiled_version_map(cls):
+        """Compile ``VERSION_MAP`` once per subclass, recompiling only if it is reassigned"""
+        compiled = cls.__dict__.get('_compiled_version_map')
+        if compiled is None or compiled.version_map is not cls.VERSION_MAP:
+            compiled = CompiledVersionMap(cls.VERSION_MAP, cls.OPERATORS)
+            cls._compiled_version_map = compiled
+        return compiled
+
+
+class CompiledVersionMap:
+    """A ``VERSION_MAP`` with pre-parsed constraints.
+
+    The distinct versions mentioned by the constraints split the version line into the versions themselves
+    and the open intervals between them. Every constraint has the same outcome for all versions of an interval,
+    so the matching serializer of each region is computed upfront and looked up with a binary search.
+    """
+
+    def __init__(self, version_map, operators, maxsize=256):
+        self.version_map = version_map
+        self.operators = operators
+        entries = [
+            ([self.parse_constraint(constraint) for constraint in allowed_version.split(',')], schema)
+            for allowed_version, schema in version_map
+        ]
+        self.boundaries = sorted({version for constraints, _ in entries for _, version in constraints})
+
+        # points[i] matches boundaries[i], intervals[i] matches versions between boundaries[i - 1] and boundaries[i]
+        self.points = [self._first_match(entries, boundary) for boundary in self.boundaries]
+        lower_bounds = [None] + self.boundaries
+        upper_bounds = self.boundaries + [None]
+        self.intervals = [self._first_match(entries, None, lower, upper)
+                          for lower, upper in zip(lower_bounds, upper_bounds)]
+
+        self.resolve = lru_cache(maxsize=maxsize)(self._resolve)
+
+    def parse_constraint(self, constraint):
+        constraint = constraint.strip()
+        for symbol in (constraint[:2], constraint[:1]):
+            if symbol in self.operators:
+                return symbol, parse_version(constraint[len(symbol):].strip())
+        return '==', parse_version(constraint)
+
+    def _first_match(self, entries, point, *interval):
+        for constraints, schema in entries:
+            if all(self._holds(symbol, version, point, *interval) for symbol, version in constraints):
                 return schema
+        return None
+
+    def _holds(self, symbol, version, point, lower=None, upper=None):
+        if point is not None:
+            return self.operators[symbol](point, version)
+        # ``version`` is a boundary, so it lies either at or below ``lower`` or at or above ``upper``
+        if symbol in ('>', '>='):
+            return lower is not None and version <= lower
+        if symbol in ('<', '<='):
+            return upper is not None and version >= upper
+        return False
+
+    def _resolve(self, request_version):
+        parsed = parse_version(request_version)
+        index = bisect_left(self.boundaries, parsed)
+        if index < len(self.boundaries) and self.boundaries[index] == parsed:
+            schema = self.points[index]
+        else:
+            schema = self.intervals[index]
+
+        if schema is None:
+            raise ValueError('Invalid request version {}'.format(request_version))
+        return schema
 
-        raise ValueError('Invalid request version {}'.format(request_version))
-    get.__func__.__annotations__ = {'request_version': str}
+
+class DefinitionConflict(Exception):
+    pass
 
 
 class OpenApiSchemaGenerator(SchemaGenerator):
+    # Processes generating links in parallel, ``None`` for the ``SCHEMA_PARALLEL_WORKERS`` setting
+    parallel_workers = None
+
     def __init__(self, version, title=None, url=None, description=None, patterns=None, urlconf=None):
         self.version = version
+        self.definitions = OrderedDict()
+        self._definition_names = {}
+        self._definition_sources = {}
+        self.endpoint_links = None
+        self.stats = SchemaBuildStats()
         super(OpenApiSchemaGenerator, self).__init__(title, url, description, patterns, urlconf)
 
     def get_schema(self, request=None, public=False):
         if self.endpoints is None:
-            inspector = self.endpoint_inspector_cls(self.patterns, self.urlconf)
-            self.endpoints = inspector.get_api_endpoints()
+            self.endpoints = self.get_endpoints()
 
         links = self.get_links(None if public else request)
+        return self.get_document(links, request)
+
+    def get_schemas(self, versions, request=None, public=False):
+        """
+        Return an ordered dictionary of the document of each version, or `None` for versions without links.
+        Endpoints, views and the version independent parts of their links are computed once. The link of an
+        endpoint is reused, along with its definitions, by every later version resolving its response serializer
+        to the same class, so that versions only generate the responses that differ.
+        """
+        if self.endpoints is None:
+            self.endpoints = self.get_endpoints()
+
+        generators = []
+        for version in versions:
+            generator = self.get_version_generator(version)
+            generator.endpoints = self.endpoints
+            generators.append(generator)
+
+        request_links = None if public else request
+        permissions = None
+        shared = get_link_cache() is None and not self.get_parallel_workers(len(self.endpoints))
+        if shared and type(self).get_link is OpenApiSchemaGenerator.get_link:
+            view_endpoints, prefix = self.get_view_endpoints(request_links)
+            if request_links is not None:
+                # Views are created regardless of the version, so the permissions of the request are too
+                view_endpoints = self.get_permitted_view_endpoints(view_endpoints, request_links)
+                permissions = [True] * len(view_endpoints)
+            endpoint_templates = []
+            for path, method, callback, view in view_endpoints:
+                with self.stats.timer('get_link'):
+                    template = self.get_link_template(path, method, view)
+                keys = self.get_keys(path[len(prefix):], method, view)
+                endpoint_templates.append((path, method, callback, view, keys, template))
+
+            resolved = []
+            for generator in generators:
+                serializer_classes = [
+                    generator.get_response_serializer_class(template, view, generator.version)
+                    for _, _, _, view, _, template in endpoint_templates
+                ]
+                leaders = [
+                    next((other for other, classes in resolved if classes[index] == serializer_class), None)
+                    for index, serializer_class in enumerate(serializer_classes)
+                ]
+                try:
+                    generator.endpoint_links = generator.get_versioned_endpoint_links(endpoint_templates, leaders)
+                except DefinitionConflict as exc:
+                    logger.debug('Regenerating every link of version %s: %s', generator.version, exc)
+                    generator.definitions, generator._definition_names = OrderedDict(), {}
+                    generator.endpoint_links = generator.get_versioned_endpoint_links(endpoint_templates)
+                generator.stats.count('links', len(generator.endpoint_links))
+                resolved.append((generator, serializer_classes))
+
+        documents = OrderedDict()
+        for generator in generators:
+            links = generator.get_links(request_links, permissions=permissions)
+            documents[generator.version] = generator.get_document(links, request)
+        return documents
+
+    def get_version_generator(self, version):
+        """
+        Return a generator of the version, configured like this one
+        """
+        generator = self.__class__(
+            version=version, title=self.title, url=self.url, description=self.description,
+            patterns=self.patterns, urlconf=self.urlconf
+        )
+        generator.parallel_workers = self.parallel_workers
+        return generator
+
+    def get_versioned_endpoint_links(self, endpoint_templates, leaders=None):
+        """
+        Return the `EndpointLink` of every endpoint template for the version of this generator.
+        ``leaders`` holds for each endpoint a generator of another version resolving the same response serializer,
+        or `None`. Their links are reused along with their definitions, so that only the URLs are specific
+        to this version. Raise `DefinitionConflict` when definitions would be named otherwise in this version.
+        """
+        leader_classes = {}
+        endpoint_links = []
+        for index, (path, method, callback, view, keys, template) in enumerate(endpoint_templates):
+            leader = leaders[index] if leaders else None
+            if leader is None:
+                with self.stats.timer('get_link'):
+                    link = self.get_versioned_link(template, path, method, view, version=self.version)
+            else:
+                shared = leader.endpoint_links[index].link
+                if leader not in leader_classes:
+                    leader_classes[leader] = {name: cls for cls, name in leader._definition_names.items()}
+                for name in _iter_refs(shared.response_schema):
+                    self.adopt_definition(leader, name, leader_classes[leader])
+                link = OpenApiLink(
+                    response_schema=shared.response_schema,
+                    error_status_codes=shared.error_status_codes,
+                    url=path.replace('{version}', self.version),
+                    action=shared.action,
+                    encoding=shared.encoding,
+                    fields=shared.fields,
+                    description=shared.description
+                )
+            endpoint_links.append(EndpointLink(path, method, callback, keys, link))
+        return endpoint_links
+
+    def adopt_definition(self, leader, name, serializer_classes):
+        """
+        Add the definition ``name`` of ``leader``, and those it references, in the order and under the names
+        generating them in this document would give them. ``serializer_classes`` maps the names of the
+        definitions of ``leader`` to their serializer classes.
+        """
+        serializer_class = serializer_classes[name]
+        adopted = self._definition_names.get(serializer_class)
+        if adopted is None:
+            adopted = self.get_definition_name(serializer_class)
+            if adopted == name:
+                self._definition_names[serializer_class] = name
+                self.definitions[name] = definition = leader.definitions[name]
+                for nested_name in _iter_refs(definition):
+                    self.adopt_definition(leader, nested_name, serializer_classes)
+        if adopted != name:
+            raise DefinitionConflict('{} is named {} in version {} but {} in version {}'.format(
+                get_class_path(serializer_class), name, leader.version, adopted, self.version))
+
+    def get_document(self, links, request=None):
+        """
+        Return the `OpenApiDocument` of the links, or `None` when there are none
+        """
         if not links:
             return None
 
@@ -102,46 +297,293 @@ class OpenApiSchemaGenerator(SchemaGenerator):
             url = request.build_absolute_uri()
 
         distribute_links(links)
-        return OpenApiDocument(
+        document = OpenApiDocument(
             version=self.version,
             title=self.title, description=self.description,
-            url=url, content=links
+            url=url, content=links, definitions=self.get_referenced_definitions(links)
         )
 
-    def get_links(self, request=None):
+        logger.debug('Generated schema of version %s: %s', self.version, self.stats)
+        schema_generated.send(sender=self.__class__, generator=self, stats=self.stats)
+        return document
+
+    def get_endpoints(self):
+        """
+        Return the (path, method, callback) of every API endpoint. Endpoints of a urlconf are enumerated
+        once per process and cached along with its URL resolver, so that clearing Django's URL caches
+        also drops them. Explicitly given patterns are enumerated every time.
+        """
+        with self.stats.timer('endpoints'):
+            if self.patterns is not None:
+                endpoints = self.endpoint_inspector_cls(self.patterns, self.urlconf).get_api_endpoints()
+            else:
+                resolver = get_resolver(self.urlconf)
+                with _endpoints_lock:
+                    resolver_endpoints = _endpoints.setdefault(resolver, {})
+                    if self.endpoint_inspector_cls not in resolver_endpoints:
+                        inspector = self.endpoint_inspector_cls(self.patterns, self.urlconf)
+                        resolver_endpoints[self.endpoint_inspector_cls] = inspector.get_api_endpoints()
+                    endpoints = list(resolver_endpoints[self.endpoint_inspector_cls])
+
+        self.stats.count('endpoints', len(endpoints))
+        return endpoints
+
+    def get_links(self, request=None, permissions=None):
         """
         Return a dictionary containing all the links that should be
         included in the API schema.
+        ``permissions`` are those of `get_view_permissions`, when already known.
         """
+        if self.endpoint_links is None and request is not None:
+            # Links of a single request are only generated for the endpoints it has permissions for
+            endpoint_links = self.get_endpoint_links(request)
+            permissions = [True] * len(endpoint_links)
+        else:
+            if self.endpoint_links is None:
+                self.endpoint_links = self.get_endpoint_links()
+            endpoint_links = self.endpoint_links
+        if not endpoint_links:
+            return None
+
+        if permissions is None:
+            permissions = self.get_view_permissions(request)
+
         links = LinkNode()
+        for endpoint_link, allowed in zip(endpoint_links, permissions):
+            if not allowed:
+                continue
+            try:
+                insert_into(links, endpoint_link.keys, endpoint_link.link)
+            except Exception:
+                continue
+        return links
+
+    def get_endpoint_links(self, request=None):
+        """
+        Return an `EndpointLink` for every endpoint included in the schema.
+        Without a request, links of every endpoint are generated from views created without one so that they can
+        be shared by every request, which `get_links` then filters by the permissions of each request.
+        With a request, links are only generated for the endpoints it has permissions for, from views bound
+        to it, except those whose links the link cache shares.
+        """
+        view_endpoints, prefix = self.get_view_endpoints(request)
+        if request is not None:
+            view_endpoints = self.get_permitted_view_endpoints(view_endpoints, request)
+        if not view_endpoints:
+            return []
+
+        link_cache = get_link_cache()
+        workers = self.get_parallel_workers(len(view_endpoints))
+        if link_cache is not None:
+            cached_endpoints = view_endpoints if request is None else [
+                (path, method, callback, self.create_view(callback, method))
+                for path, method, callback, _ in view_endpoints
+            ]
+            try:
+                endpoint_links = self._get_endpoint_links(cached_endpoints, prefix, link_cache, request)
+            except DefinitionConflict as exc:
+                logger.debug('Regenerating every link of version %s: %s', self.version, exc)
+                self.definitions, self._definition_names, self._definition_sources = OrderedDict(), {}, {}
+                endpoint_links = self._get_endpoint_links(view_endpoints, prefix)
+            link_cache.save()
+        elif workers:
+            try:
+                endpoint_links = self._get_parallel_endpoint_links(view_endpoints, prefix, workers)
+            except DefinitionConflict as exc:
+                logger.debug('Regenerating every link of version %s sequentially: %s', self.version, exc)
+                self.definitions, self._definition_names, self._definition_sources = OrderedDict(), {}, {}
+                endpoint_links = self._get_endpoint_links(view_endpoints, prefix)
+        else:
+            endpoint_links = self._get_endpoint_links(view_endpoints, prefix)
+
+        self.stats.count('links', len(endpoint_links))
+        return endpoint_links
+
+    def get_view_endpoints(self, request=None):
+        """
+        Return the (path, method, callback, view) of every endpoint included in the schema,
+        and the common prefix of their paths. Views are bound to the request, if any.
+        """
+        if self.endpoints is None:
+            self.endpoints = self.get_endpoints()
 
         # Generate (path, method, view) given (path, method, callback).
         paths = []
         view_endpoints = []
-        for path, method, callback in self.endpoints:
-            view = self.create_view(callback, method, request)
-            if getattr(view, 'exclude_from_schema', False):
-                continue
-            path = self.coerce_path(path, method, view)
-            paths.append(path)
-            view_endpoints.append((path, method, view))
+        with self.stats.timer('create_view'):
+            for path, method, callback in self.endpoints:
+                view = self.create_view(callback, method, request)
+                if getattr(view, 'exclude_from_schema', False):
+                    continue
+                path = self.coerce_path(path, method, view)
+                paths.append(path)
+                view_endpoints.append((path, method, callback, view))
 
         # Only generate the path prefix for paths that will be included
         if not paths:
-            return None
-        prefix = self.determine_path_prefix(paths)
+            return [], None
+        return view_endpoints, self.determine_path_prefix(paths)
 
-        for path, method, view in view_endpoints:
-            if not self.has_view_permissions(path, method, view):
-                continue
-            link = self.get_link(path, method, view, version=getattr(request, 'version', None))
+    def get_permitted_view_endpoints(self, view_endpoints, request):
+        """
+        Return the view endpoints whose views, bound to the request, grant it their permissions
+        """
+        with self.stats.timer('permissions'):
+            return [
+                (path, method, callback, view) for path, method, callback, view in view_endpoints
+                if self.has_view_permissions(path, method, view)
+            ]
+
+    def _get_endpoint_links(self, view_endpoints, prefix, link_cache=None, request=None):
+        module_stats = {}
+        endpoint_links = []
+        for path, method, callback, view in view_endpoints:
+            with self.stats.timer('get_link'):
+                if link_cache is None:
+                    link = self.get_link(path, method, view, version=self.version)
+                else:
+                    try:
+                        link = self.get_cached_link(link_cache, path, method, view, module_stats)
+                    except DefinitionConflict:
+                        raise
+                    except Exception:
+                        if request is None:
+                            raise
+                        # Views depending on the request get links of their own, which are not cached
+                        link = self.get_link(
+                            path, method, self.create_view(callback, method, request), version=self.version)
             subpath = path[len(prefix):]
             keys = self.get_keys(subpath, method, view)
+            endpoint_links.append(EndpointLink(path, method, callback, keys, link))
+        return endpoint_links
+
+    def get_parallel_workers(self, endpoints_count):
+        """
+        Return the number of processes to generate the links of the endpoints with, 0 to generate them sequentially.
+        Workers are forked, so links are only generated in parallel where processes can be forked, from Python 3.7.
+        """
+        workers = self.parallel_workers
+        if workers is None:
+            workers = openapi_settings.SCHEMA_PARALLEL_WORKERS
+        if not workers or workers < 2 or endpoints_count < 2 or not parallel.is_available():
+            return 0
+        return min(workers, endpoints_count)
+
+    def _get_parallel_endpoint_links(self, view_endpoints, prefix, workers):
+        """
+        Generate the links of the endpoints in a pool of processes, then merge them and their definitions in
+        endpoint order, so that the document is the same as one generated sequentially.
+        """
+        compact = openapi_settings.SCHEMA_COMPACT
+        with self.stats.timer('get_link'):
+            results = parallel.generate_links(self, view_endpoints, workers, compact)
+
+        endpoint_links = []
+        for (path, method, callback, view), (data, definitions, sources) in zip(view_endpoints, results):
+            self.merge_definitions(definitions, sources)
+            link = OpenApiLink(
+                response_schema=data['response_schema'],
+                error_status_codes=data['error_status_codes'],
+                url=data['url'],
+                action=data['action'],
+                encoding=data['encoding'],
+                fields=data['fields'],
+                description=data['description']
+            )
+            # Operations were encoded by the workers too, see `drf_openapi.codec._get_link_operation`
+            link._openapi_operations = {compact: data['operation']}
+            keys = self.get_keys(path[len(prefix):], method, view)
+            endpoint_links.append(EndpointLink(path, method, callback, keys, link))
+        return endpoint_links
+
+    def get_cached_link(self, link_cache, path, method, view, module_stats=None):
+        """
+        Return the link of the endpoint from the link cache, generating it only if the endpoint changed.
+        Links are generated with definitions of their own, which are then merged into those of the document.
+        """
+        fingerprint = get_endpoint_fingerprint(path, method, view, self.version, self.urlconf, module_stats)
+        entry = link_cache.get(fingerprint)
+        if entry is None:
+            self.stats.count('links_generated')
+            document_definitions = self.definitions, self._definition_names
+            self.definitions, self._definition_names = OrderedDict(), {}
             try:
-                insert_into(links, keys, link)
-            except Exception:
-                continue
-        return links
+                link = self.get_link(path, method, view, version=self.version)
+                sources = {name: get_class_path(cls) for cls, name in self._definition_names.items()}
+                entry = (link, self.definitions, sources)
+            finally:
+                self.definitions, self._definition_names = document_definitions
+            link_cache.set(fingerprint, entry)
+
+        link, definitions, sources = entry
+        self.merge_definitions(definitions, sources)
+        return link
+
+    def merge_definitions(self, definitions, sources):
+        """
+        Add definitions generated for a single link to those of the document.
+        Raise `DefinitionConflict` when a name is already taken by another serializer, as the names of a
+        document generated at once would differ.
+        """
+        for name, definition in definitions.items():
+            if name not in self.definitions:
+                self.definitions[name] = definition
+                self._definition_sources[name] = sources[name]
+            elif self._definition_sources.get(name) != sources[name] or self.definitions[name] != definition:
+                raise DefinitionConflict('{} is defined by {} and {}'.format(
+                    name, self._definition_sources.get(name), sources[name]))
+
+    def get_view_permissions(self, request=None):
+        """
+        Return whether the request has the permissions of each endpoint link.
+        Permissions only depend on the endpoints, so links are not generated to check them.
+        """
+        if self.endpoint_links is not None:
+            endpoints = [(link.path, link.method, link.callback) for link in self.endpoint_links]
+        else:
+            endpoints = [(path, method, callback) for path, method, callback, _ in self.get_view_endpoints()[0]]
+
+        with self.stats.timer('permissions'):
+            return [
+                self.has_view_permissions(
+                    path,
+                    method,
+                    self.create_view(callback, method, request)
+                ) if request is not None else True
+                for path, method, callback in endpoints
+            ]
+
+    def get_permission_fingerprint(self, request=None):
+        """
+        Return a digest of the endpoints the request has permissions for.
+        Requests with the same fingerprint share the same schema.
+        """
+        permissions = ''.join('1' if allowed else '0' for allowed in self.get_view_permissions(request))
+        return hashlib.sha1(permissions.encode('ascii')).hexdigest()
+
+    def get_referenced_definitions(self, links):
+        """
+        Return the definitions referenced by the links, directly or through other definitions
+        """
+        pending = []
+        nodes = [links]
+        while nodes:
+            for value in nodes.pop().values():
+                if isinstance(value, OpenApiLink):
+                    pending.extend(_iter_refs(value.response_schema))
+                else:
+                    nodes.append(value)
+
+        referenced = set()
+        while pending:
+            name = pending.pop()
+            if name not in referenced and name in self.definitions:
+                referenced.add(name)
+                pending.extend(_iter_refs(self.definitions[name]))
+
+        return OrderedDict(
+            (name, definition) for name, definition in self.definitions.items() if name in referenced
+        )
 
     def get_serializer_doc(self, serializer):
         if serializer.__doc__ is None:
@@ -153,11 +595,17 @@ class OpenApiSchemaGenerator(SchemaGenerator):
         return '\n'.join(doc)
 
     def get_link(self, path, method, view, version=None):
+        return self.get_versioned_link(self.get_link_template(path, method, view), path, method, view, version)
+
+    def get_link_template(self, path, method, view):
+        """
+        Return the parts of the link of an endpoint that do not depend on the version
+        """
         method_name = getattr(view, 'action', method.lower())
         method_func = getattr(view, method_name, None)
 
         fields = self.get_path_fields(path, method, view)
-        fields += self.get_serializer_fields(path, method, view, version=version, method_func=method_func)
+        fields += self.get_serializer_fields(path, method, view, method_func=method_func)
         fields += view.schema.get_pagination_fields(path, method)
         fields += view.schema.get_filter_fields(path, method)
 
@@ -179,40 +627,53 @@ class OpenApiSchemaGenerator(SchemaGenerator):
             res_doc = self.get_serializer_doc(response_serializer_class)
             if res_doc:
                 description = description + '\n\n**Response Description:**\n' + res_doc
-            response_serializer_class = response_serializer_class.get(version)
 
-        if not response_serializer_class and method_name in ('list', 'retrieve'):
-            if hasattr(view, 'get_serializer_class'):
-                response_serializer_class = view.get_serializer_class()
-            elif hasattr(view, 'serializer_class'):
-                response_serializer_class = view.serializer_class
-            if response_serializer_class and method_name == 'list':
-                response_serializer_class = self.get_paginator_serializer(
-                    view, response_serializer_class)
+        return LinkTemplate(
+            method_name=method_name,
+            fields=fields,
+            encoding=encoding,
+            description=description,
+            response_serializer_class=response_serializer_class,
+            response_description=method_func.__doc__,
+        )
+
+    def get_versioned_link(self, template, path, method, view, version=None):
+        """
+        Return the link of an endpoint from its template, describing the response of the version
+        """
+        response_serializer_class = self.get_response_serializer_class(template, view, version)
         response_schema, error_status_codes = self.get_response_object(
-            response_serializer_class, method_func.__doc__) if response_serializer_class else ({}, {})
+            response_serializer_class, template.response_description) if response_serializer_class else ({}, {})
 
         return OpenApiLink(
             response_schema=response_schema,
             error_status_codes=error_status_codes,
             url=path.replace('{version}', self.version),  # can't use format because there may be other param
             action=method.lower(),
-            encoding=encoding,
-            fields=fields,
-            description=description
+            encoding=template.encoding,
+            fields=template.fields,
+            description=template.description
         )
 
-    def get_paginator_serializer(self, view, child_serializer_class):
-        class BaseFakeListSerializer(serializers.Serializer):
-            results = child_serializer_class(many=True)
+    def get_response_serializer_class(self, template, view, version=None):
+        response_serializer_class = template.response_serializer_class
+        if response_serializer_class and issubclass(response_serializer_class, VersionedSerializers):
+            response_serializer_class = response_serializer_class.get(version)
 
-        class FakePrevNextListSerializer(BaseFakeListSerializer):
-            next = URLField()
-            previous = URLField()
+        if not response_serializer_class and template.method_name in ('list', 'retrieve'):
+            if hasattr(view, 'get_serializer_class'):
+                response_serializer_class = view.get_serializer_class()
+            elif hasattr(view, 'serializer_class'):
+                response_serializer_class = view.serializer_class
+            if response_serializer_class and template.method_name == 'list':
+                response_serializer_class = self.get_paginator_serializer(
+                    view, response_serializer_class)
+        return response_serializer_class
 
+    def get_paginator_serializer(self, view, child_serializer_class):
         # Validate if the view has a pagination_class
         if not (hasattr(view, 'pagination_class')) or view.pagination_class is None:
-            return BaseFakeListSerializer
+            return get_list_serializer(child_serializer_class, LIST)
 
         pager = view.pagination_class
         if hasattr(pager, 'default_pager'):
@@ -220,13 +681,11 @@ class OpenApiSchemaGenerator(SchemaGenerator):
             pager = pager.default_pager
 
         if issubclass(pager, (PageNumberPagination, LimitOffsetPagination)):
-            class FakeListSerializer(FakePrevNextListSerializer):
-                count = IntegerField()
-            return FakeListSerializer
+            return get_list_serializer(child_serializer_class, PAGE)
         elif issubclass(pager, CursorPagination):
-            return FakePrevNextListSerializer
+            return get_list_serializer(child_serializer_class, CURSOR_PAGE)
 
-        return BaseFakeListSerializer
+        return get_list_serializer(child_serializer_class, LIST)
 
     def get_path_fields(self, path, method, view):
         """
@@ -321,8 +780,15 @@ class OpenApiSchemaGenerator(SchemaGenerator):
         if not serializer_class:
             return []
 
-        serializer = serializer_class()
-        if isinstance(serializer, serializers.ListSerializer):
+        memo_key = ('request', location, method == 'PATCH')
+        fields = _get_memoized(serializer_class, memo_key)
+        if fields is None:
+            fields = _set_memoized(serializer_class, memo_key, self._get_request_fields(
+                serializer_class, location, partial=method == 'PATCH'))
+        return list(fields)
+
+    def _get_request_fields(self, serializer_class, location, partial):
+        if isinstance(serializer_class, type) and issubclass(serializer_class, serializers.ListSerializer):
             return [
                 Field(
                     name='data',
@@ -332,92 +798,266 @@ class OpenApiSchemaGenerator(SchemaGenerator):
                 )
             ]
 
-        if not isinstance(serializer, serializers.Serializer):
-            return []
-
         fields = []
-        for field in serializer.fields.values():
+        for descriptor in self.get_serializer_field_descriptors(serializer_class):
+            field = descriptor.field
             if field.read_only or isinstance(field, serializers.HiddenField):
                 continue
 
-            required = field.required and method != 'PATCH'
+            required = field.required and not partial
             # if the attribute ('help_text') of this field is a lazy translation object, force it to generate a string
             description = str(field.help_text) if isinstance(field.help_text, Promise) else field.help_text
-            fallback_schema = self.fallback_schema_from_field(field)
-            field = Field(
-                name=field.field_name,
+            fields.append(Field(
+                name=descriptor.name,
                 location=location,
                 required=required,
-                schema=fallback_schema if fallback_schema else field_to_schema(field),
+                schema=descriptor.schema or field_to_schema(field),
                 description=description,
-            )
-            fields.append(field)
+            ))
 
         return fields
 
+    def get_serializer_field_descriptors(self, serializer_class):
+        """
+        Return a `SerializerFieldDescriptor` for every field of the serializer.
+        The serializer is instantiated once per class, its descriptors are reused by every later schema build.
+        """
+        descriptors = _get_memoized(serializer_class, ('fields',))
+        if descriptors is not None:
+            return descriptors
+
+        descriptors = ()
+        if isinstance(serializer_class, type) and issubclass(serializer_class, serializers.Serializer):
+            self.stats.count('serializers_instantiated')
+            descriptors = tuple(
+                SerializerFieldDescriptor(
+                    name=field.field_name,
+                    field=field,
+                    schema=None if isinstance(field, serializers.BaseSerializer) else (
+                        self.fallback_schema_from_field(field) or field_to_schema(field))
+                )
+                for field in serializer_class().fields.values()
+            )
+        return _set_memoized(serializer_class, ('fields',), descriptors)
+
     def get_response_object(self, response_serializer_class, description):
+        definition = self.get_definition(response_serializer_class)
+        if definition is None:
+            return {}, {}
 
-        fields = []
-        serializer = response_serializer_class()
-        nested_obj = {}
+        response_schema = {
+            'description': description,
+            'schema': definition
+        }
 
-        for field in serializer.fields.values():
-            # If field is a serializer, attempt to get its schema.
-            if isinstance(field, serializers.Serializer):
-                subfield_schema = self.get_response_object(field.__class__, None)[0].get('schema')
+        error_status_codes = {}
+
+        response_meta = getattr(response_serializer_class, 'Meta', None)
+
+        for status_code, description in getattr(response_meta, 'error_status_codes', {}).items():
+            error_status_codes[status_code] = {'description': description}
 
-                # If the schema exists, use it as the nested_obj
-                if subfield_schema is not None:
-                    nested_obj[field.field_name] = subfield_schema
-                    nested_obj[field.field_name]['description'] = field.help_text
+        return response_schema, error_status_codes
+
+    def get_definition(self, serializer_class):
+        """
+        Return a `$ref` to the schema of the serializer, adding the schema and those of its
+        nested serializers to the `definitions` of the document. Serializers without any field have no schema.
+        """
+        name = self._definition_names.get(serializer_class)
+        if name is None:
+            schema, nested = self.get_serializer_schema(serializer_class)
+            if schema is None:
+                return None
+
+            name = self._definition_names[serializer_class] = self.get_definition_name(serializer_class)
+            # Shallow copies keep the memoized schema intact, nested refs depend on the names of this document
+            definition = dict(schema, properties=OrderedDict(schema['properties']))
+            self.definitions[name] = definition
+            for field_name, nested_class, many, required, help_text in nested:
+                ref = self.get_definition(nested_class)
+                if ref is None:
                     continue
+                prop = {'type': 'array', 'items': ref} if many else dict(ref)
+                if help_text:
+                    prop['description'] = force_text(help_text)
+                definition['properties'][field_name] = prop
+                if required:
+                    definition['required'] = definition.get('required', []) + [field_name]
+
+        return {'$ref': '#/definitions/' + name}
+
+    def get_definition_name(self, serializer_class):
+        """
+        Name definitions after their serializer, qualifying names shared by several serializers
+        """
+        name = serializer_class.__name__
+        if name in self.definitions:
+            name = '{}.{}'.format(serializer_class.__module__, name)
+        candidate, suffix = name, 2
+        while candidate in self.definitions:
+            candidate = '{}{}'.format(name, suffix)
+            suffix += 1
+        return candidate
+
+    def get_serializer_schema(self, serializer_class):
+        """
+        Return the object schema of the serializer's own fields, memoized per serializer class,
+        along with ``(field_name, serializer_class, many, required, help_text)`` of its nested serializers.
+        """
+        memo_key = ('response',)
+        schema = _get_memoized(serializer_class, memo_key)
+        if schema is None:
+            schema = _set_memoized(serializer_class, memo_key, self._get_serializer_schema(serializer_class))
+        return schema
+
+    def _get_serializer_schema(self, serializer_class):
+        fields = []
+        nested = []
+
+        for descriptor in self.get_serializer_field_descriptors(serializer_class):
+            field = descriptor.field
+            # Nested serializers are referenced through their own definition
+            if isinstance(field, serializers.Serializer):
+                nested.append((descriptor.name, field.__class__, False, field.required, field.help_text))
+                continue
+            if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.Serializer):
+                nested.append((descriptor.name, field.child.__class__, True, field.required, field.help_text))
+                continue
 
-            # Otherwise, carry-on and use the field's schema.
-            fallback_schema = self.fallback_schema_from_field(field)
             fields.append(Field(
-                name=field.field_name,
+                name=descriptor.name,
                 location='form',
                 required=field.required,
-                schema=fallback_schema if fallback_schema else field_to_schema(field),
+                schema=descriptor.schema or field_to_schema(field),
             ))
 
+        # The codec pulls in the renderers, import it once schemas are actually generated
+        from drf_openapi.codec import _get_parameters
         res = _get_parameters(Link(fields=fields), None)
+        if res:
+            schema = res[0]['schema']
+        elif nested:
+            schema = {'type': 'object', 'properties': {}}
+        else:
+            schema = None
+        return schema, nested
 
-        if not res:
-            if nested_obj:
-                return {
-                    'description': description,
-                    'schema': {
-                        'type': 'object',
-                        'properties': nested_obj
-                    }
-                }, {}
-            else:
-                return {}, {}
 
-        schema = res[0]['schema']
-        schema['properties'].update(nested_obj)
-        response_schema = {
-            'description': description,
-            'schema': schema
-        }
+EndpointLink = namedtuple('EndpointLink', ['path', 'method', 'callback', 'keys', 'link'])
 
-        error_status_codes = {}
+LinkTemplate = namedtuple('LinkTemplate', [
+    'method_name', 'fields', 'encoding', 'description', 'response_serializer_class', 'response_description'
+])
+LinkTemplate.__doc__ = """The version independent parts of the link of an endpoint.
+The response serializer may be a `VersionedSerializers`."""
 
-        response_meta = getattr(response_serializer_class, 'Meta', None)
 
-        for status_code, description in getattr(response_meta, 'error_status_codes', {}).items():
-            error_status_codes[status_code] = {'description': description}
+def _iter_refs(schema):
+    """Yield the definition names referenced anywhere in the schema"""
+    if isinstance(schema, dict):
+        ref = schema.get('$ref')
+        if isinstance(ref, str) and ref.startswith('#/definitions/'):
+            yield ref[len('#/definitions/'):]
+        for value in schema.values():
+            for name in _iter_refs(value):
+                yield name
+    elif isinstance(schema, (list, tuple)):
+        for value in schema:
+            for name in _iter_refs(value):
+                yield name
 
-        return response_schema, error_status_codes
+
+# Enumerated API endpoints per URL resolver and endpoint inspector class
+_endpoints = WeakKeyDictionary()
+_endpoints_lock = Lock()
+
+# Families of list responses, see `get_list_serializer`
+LIST, CURSOR_PAGE, PAGE = 'List', 'CursorPage', 'Page'
+
+_list_serializers_lock = Lock()
+
+
+def get_list_serializer(child_serializer_class, family):
+    """
+    Return the serializer of list responses of the child serializer, created once per child:
+    - `LIST`: results
+    - `CURSOR_PAGE`: results, next and previous
+    - `PAGE`: results, next, previous and count
+    """
+    with _list_serializers_lock:
+        list_serializers = _get_memoized(child_serializer_class, ('list_serializers',))
+        if list_serializers is None:
+            name = child_serializer_class.__name__
+            base = type(name + LIST, (serializers.Serializer,), {
+                '__module__': __name__,
+                'results': child_serializer_class(many=True),
+            })
+            prev_next = type(name + CURSOR_PAGE, (base,), {
+                '__module__': __name__,
+                'next': URLField(),
+                'previous': URLField(),
+            })
+            page = type(name + PAGE, (prev_next,), {
+                '__module__': __name__,
+                'count': IntegerField(),
+            })
+            list_serializers = _set_memoized(child_serializer_class, ('list_serializers',), {
+                LIST: base, CURSOR_PAGE: prev_next, PAGE: page
+            })
+    return list_serializers[family]
+
+
+def clear_caches():
+    """Empty the process-wide caches of endpoints, list serializers, serializer schemas and links"""
+    with _endpoints_lock:
+        _endpoints.clear()
+    with _list_serializers_lock:
+        for serializer_class in list(_memoized_classes):
+            if _MEMO_ATTR in serializer_class.__dict__:
+                delattr(serializer_class, _MEMO_ATTR)
+        _memoized_classes.clear()
+    clear_link_caches()
+
+
+SerializerFieldDescriptor = namedtuple('SerializerFieldDescriptor', ['name', 'field', 'schema'])
+SerializerFieldDescriptor.__doc__ = """A bound serializer field along with its precomputed `coreschema` schema.
+Nested serializers have no schema."""
+
+
+# Schemas, fields and list serializers derived from serializer classes, memoized per class and purpose in an attribute
+# of the class itself. Memoized values reference the class, through bound fields for instance, so a dictionary keyed by
+# weak references would keep classes alive, while the attribute is collected along with the class.
+_MEMO_ATTR = '_drf_openapi_memo'
+_memoized_classes = WeakSet()
+
+
+def _get_memoized(serializer_class, key):
+    return getattr(serializer_class, '__dict__', {}).get(_MEMO_ATTR, {}).get(key)
+
+
+def _set_memoized(serializer_class, key, value):
+    memo = getattr(serializer_class, '__dict__', {}).get(_MEMO_ATTR)
+    if memo is None:
+        memo = {}
+        try:
+            setattr(serializer_class, _MEMO_ATTR, memo)
+            _memoized_classes.add(serializer_class)
+        except (AttributeError, TypeError):
+            # Built-in and slotted types cannot be memoized, their values are computed every time
+            return value
+    memo[key] = value
+    return value
 
 
 class OpenApiDocument(Document):
     """OpenAPI-compliant document provides:
     - Versioning information
+    - Schema definitions referenced by the responses
     """
 
-    def __init__(self, version, url=None, title=None, description=None, media_type=None, content=None):
+    def __init__(self, version, url=None, title=None, description=None, media_type=None, content=None,
+                 definitions=None):
         super(OpenApiDocument, self).__init__(
             url=url,
             title=title,
@@ -426,11 +1066,16 @@ class OpenApiDocument(Document):
             content=content
         )
         self._version = version
+        self._definitions = definitions or OrderedDict()
 
     @property
     def version(self):
         return self._version
 
+    @property
+    def definitions(self):
+        return self._definitions
+
 
 class OpenApiLink(Link):
     """OpenAPI-compliant Link provides:
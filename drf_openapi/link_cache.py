@@ -0,0 +1,189 @@
+# coding=utf-8
+"""Cache of the links of individual endpoints, used to regenerate schemas incrementally during development.
+
+Links are keyed by a fingerprint of the endpoint, the classes it is generated from (view, serializers, pagination
+and filters, along with their bases and nested serializers) and the source files of the modules defining them,
+so that a code change only regenerates the endpoints it affects. The cache can be persisted to a file to survive
+the restarts of the autoreloader.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from drf_openapi import __version__
+from drf_openapi.cache import get_schema_fingerprint
+from drf_openapi.settings import openapi_settings
+from drf_openapi.storage import _write_atomic
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+
+
+class LinkCache:
+    """Links of endpoints along with the definitions they reference, keyed by endpoint fingerprint"""
+
+    max_entries = 10000
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint):
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(fingerprint)
+            if entry is not None:
+                entries.move_to_end(fingerprint)
+            return entry
+
+    def set(self, fingerprint, entry):
+        with self._lock:
+            entries = self._load()
+            entries[fingerprint] = entry
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._dirty = self.path is not None
+
+    def save(self):
+        """Write the cache to its file if it changed since it was loaded"""
+        with self._lock:
+            if not self._dirty or self.path is None:
+                return
+            content = pickle.dumps({
+                'format': CACHE_FORMAT,
+                'version': __version__,
+                'entries': self._entries,
+            }, pickle.HIGHEST_PROTOCOL)
+            try:
+                _write_atomic(self.path, content)
+            except OSError as exc:
+                logger.warning('Could not write the link cache to %s: %s', self.path, exc)
+                return
+            self._dirty = False
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = OrderedDict()
+            if self.path is not None and os.path.isfile(self.path):
+                try:
+                    with open(self.path, 'rb') as f:
+                        data = pickle.load(f)
+                    if data.get('format') == CACHE_FORMAT and data.get('version') == __version__:
+                        self._entries = data['entries']
+                except Exception as exc:
+                    # A stale or corrupted cache is only a slower build
+                    logger.warning('Ignoring unreadable link cache %s: %s', self.path, exc)
+        return self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+
+_link_caches = {}
+_link_caches_lock = threading.Lock()
+
+
+def get_link_cache():
+    """Return the link cache configured by ``SCHEMA_LINK_CACHE``, or ``None`` when it is disabled"""
+    enabled = openapi_settings.SCHEMA_LINK_CACHE
+    if enabled is None:
+        enabled = settings.DEBUG
+    if not enabled:
+        return None
+
+    path = openapi_settings.SCHEMA_LINK_CACHE_FILE
+    with _link_caches_lock:
+        link_cache = _link_caches.get(path)
+        if link_cache is None:
+            link_cache = _link_caches[path] = LinkCache(path)
+    return link_cache
+
+
+def clear_link_caches():
+    with _link_caches_lock:
+        for link_cache in _link_caches.values():
+            link_cache.clear()
+
+
+def get_endpoint_fingerprint(path, method, view, version, urlconf=None, module_stats=None):
+    """
+    Return a digest of everything the link of the endpoint is generated from.
+    ``module_stats`` memoizes the stats of source files across the endpoints of a build.
+    """
+    module_stats = {} if module_stats is None else module_stats
+    classes = _get_endpoint_classes(view, method)
+    modules = sorted({cls.__module__ for cls in classes})
+    parts = (
+        version,
+        path,
+        method,
+        getattr(view, 'action', None),
+        get_schema_fingerprint(urlconf),
+        sorted(getattr(settings, 'REST_FRAMEWORK', {}).items()),
+        sorted(get_class_path(cls) for cls in classes),
+        [_get_module_stat(module, module_stats) for module in modules],
+    )
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def get_class_path(cls):
+    return '{}.{}'.format(cls.__module__, getattr(cls, '__qualname__', cls.__name__))
+
+
+def _get_module_stat(module, module_stats):
+    if module not in module_stats:
+        filename = getattr(sys.modules.get(module), '__file__', None)
+        try:
+            stat = os.stat(filename) if filename else None
+        except OSError:
+            stat = None
+        module_stats[module] = (module, stat.st_mtime_ns, stat.st_size) if stat else (module,)
+    return module_stats[module]
+
+
+def _get_endpoint_classes(view, method):
+    method_func = getattr(view, getattr(view, 'action', method.lower()), None)
+    roots = [
+        view.__class__,
+        getattr(method_func, 'request_serializer', None),
+        getattr(method_func, 'response_serializer', None),
+        getattr(view, 'serializer_class', None),
+        getattr(view, 'pagination_class', None),
+    ] + list(getattr(view, 'filter_backends', None) or [])
+
+    classes = set()
+    pending = [cls for cls in roots if isinstance(cls, type)]
+    while pending:
+        cls = pending.pop()
+        if cls in classes:
+            continue
+        classes.update(base for base in cls.__mro__ if base is not object)
+        pending.extend(_get_related_classes(cls))
+    return classes
+
+
+def _get_related_classes(cls):
+    """Serializers of a versioned serializer, nested serializers and the model of a serializer"""
+    related = [serializer for _, serializer in getattr(cls, 'VERSION_MAP', None) or ()]
+    for field in (getattr(cls, '_declared_fields', None) or {}).values():
+        field = getattr(field, 'child', field)
+        related.append(field.__class__)
+    model = getattr(getattr(cls, 'Meta', None), 'model', None)
+    if model is not None:
+        related.append(model)
+    return [related_cls for related_cls in related if isinstance(related_cls, type)]
@@ -0,0 +1,58 @@
+# coding=utf-8
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.settings import api_settings
+
+from drf_openapi.codec import OpenAPICodec, OpenAPIRenderer
+from drf_openapi.entities import OpenApiSchemaGenerator
+from drf_openapi.settings import openapi_settings
+from drf_openapi.storage import write_schema
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema of every API version and write it to disk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'versions', nargs='*',
+            help='Versions to generate, defaults to REST_FRAMEWORK["ALLOWED_VERSIONS"]')
+        parser.add_argument(
+            '--output-dir', dest='output_dir', default=openapi_settings.SCHEMA_STATIC_DIR,
+            help='Directory to write the schemas to, defaults to DRF_OPENAPI["SCHEMA_STATIC_DIR"]')
+        parser.add_argument('--url', default='', help='Base URL of the API, e.g. https://api.example.com/')
+        parser.add_argument('--title', default='API Documentation', help='Title of the schema')
+        parser.add_argument('--urlconf', default=None, help='Urlconf to inspect instead of ROOT_URLCONF')
+        parser.add_argument(
+            '--parallel', type=int, default=None,
+            help='Processes generating the links of endpoints, defaults to DRF_OPENAPI["SCHEMA_PARALLEL_WORKERS"]')
+        parser.add_argument(
+            '--no-gzip', dest='compress', action='store_false',
+            help='Do not write compressed copies of the schemas')
+
+    def handle(self, *args, **options):
+        versions = options['versions'] or api_settings.ALLOWED_VERSIONS
+        if not versions:
+            raise CommandError('No versions given and REST_FRAMEWORK["ALLOWED_VERSIONS"] is not set')
+
+        output_dir = options['output_dir']
+        if not output_dir:
+            raise CommandError('No --output-dir given and DRF_OPENAPI["SCHEMA_STATIC_DIR"] is not set')
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+
+        extra = OpenAPIRenderer().get_customizations()
+        generator = OpenApiSchemaGenerator(
+            version=versions[0],
+            url=options['url'],
+            title=options['title'],
+            urlconf=options['urlconf']
+        )
+        generator.parallel_workers = options['parallel']
+        for version, document in generator.get_schemas(versions, public=True).items():
+            if document is None:
+                raise CommandError('No endpoints found for version {}'.format(version))
+
+            content = OpenAPICodec().encode(document, extra=extra)
+            for path in write_schema(version, content, output_dir, compress=options['compress']):
+                self.stdout.write('Wrote {}'.format(path))
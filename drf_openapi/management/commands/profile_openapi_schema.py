@@ -0,0 +1,112 @@
+# coding=utf-8
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.settings import api_settings
+
+from drf_openapi.entities import OpenApiSchemaGenerator, VersionedSerializers, clear_caches
+
+
+class Command(BaseCommand):
+    help = 'Profile the schema generation of every endpoint and rank endpoints by cost.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'versions', nargs='*',
+            help='Versions to profile, defaults to REST_FRAMEWORK["ALLOWED_VERSIONS"]')
+        parser.add_argument('--urlconf', default=None, help='Urlconf to inspect instead of ROOT_URLCONF')
+        parser.add_argument(
+            '--sort', choices=('time', 'memory'), default='time',
+            help='Rank endpoints by wall time or by peak memory')
+        parser.add_argument('--limit', type=int, default=20, help='Number of endpoints to report, 0 for all')
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Keep the serializer caches warm between endpoints instead of profiling each one cold')
+
+    def handle(self, *args, **options):
+        versions = options['versions'] or api_settings.ALLOWED_VERSIONS
+        if not versions:
+            raise CommandError('No versions given and REST_FRAMEWORK["ALLOWED_VERSIONS"] is not set')
+
+        profiles = []
+        for version in versions:
+            generator = OpenApiSchemaGenerator(version=version, urlconf=options['urlconf'])
+            profiles.extend(self.profile_endpoints(generator, warm=options['warm']))
+        if not profiles:
+            raise CommandError('No endpoints found')
+
+        sort_key = 'time' if options['sort'] == 'time' else 'peak'
+        profiles.sort(key=lambda profile: profile[sort_key], reverse=True)
+        if options['limit']:
+            profiles = profiles[:options['limit']]
+
+        self.stdout.write('{:>4} {:>10} {:>12} {:>12}  {:<8} {:<7} {:<40} {}'.format(
+            '#', 'time (ms)', 'peak (KiB)', 'kept (KiB)', 'version', 'method', 'path', 'serializers'))
+        for rank, profile in enumerate(profiles, 1):
+            self.stdout.write('{:>4} {:>10.2f} {:>12.1f} {:>12.1f}  {:<8} {:<7} {:<40} {}'.format(
+                rank, profile['time'] * 1000, profile['peak'] / 1024.0, profile['kept'] / 1024.0,
+                profile['version'], profile['method'], profile['path'], ', '.join(profile['serializers'])))
+
+    def profile_endpoints(self, generator, warm=False):
+        """
+        Time ``get_link`` for each endpoint, then measure in a second, traced, run the peak memory it allocates
+        and the memory still held once the link is generated.
+        Every run generates the definitions of the link in a document of its own, and unless ``warm``, caches are
+        emptied before each run so that every endpoint pays for its own serializers.
+        """
+        endpoints = generator.get_endpoints()
+        profiles = []
+        for path, method, callback in endpoints:
+            view = generator.create_view(callback, method)
+            if getattr(view, 'exclude_from_schema', False):
+                continue
+            path = generator.coerce_path(path, method, view)
+
+            self.reset(generator, warm)
+            start = time.perf_counter()
+            generator.get_link(path, method, view, version=generator.version)
+            elapsed = time.perf_counter() - start
+
+            self.reset(generator, warm)
+            tracemalloc.start()
+            try:
+                link = generator.get_link(path, method, view, version=generator.version)
+                kept, peak = tracemalloc.get_traced_memory()
+                del link
+            finally:
+                tracemalloc.stop()
+
+            profiles.append({
+                'version': generator.version,
+                'path': path,
+                'method': method,
+                'serializers': self.get_serializer_names(generator, view, method),
+                'time': elapsed,
+                'peak': peak,
+                'kept': kept,
+            })
+        return profiles
+
+    def reset(self, generator, warm=False):
+        # Definitions already in the document would spare the link the introspection of its serializers
+        generator.definitions, generator._definition_names, generator._definition_sources = OrderedDict(), {}, {}
+        if not warm:
+            clear_caches()
+
+    def get_serializer_names(self, generator, view, method):
+        method_func = getattr(view, getattr(view, 'action', method.lower()), None)
+        serializer_classes = [
+            generator.get_serializer_class(view, method_func),
+            getattr(method_func, 'response_serializer', None),
+        ]
+
+        names = []
+        for serializer_class in serializer_classes:
+            if isinstance(serializer_class, type) and issubclass(serializer_class, VersionedSerializers):
+                serializer_class = serializer_class.get(generator.version)
+            name = getattr(serializer_class, '__name__', None)
+            if name and name not in names:
+                names.append(name)
+        return names
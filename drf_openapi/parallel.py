@@ -0,0 +1,85 @@
+# coding=utf-8
+"""Generation of the links of endpoints in a pool of forked processes, for offline builds of large APIs.
+
+Workers inherit the generator and the views of the endpoints from the parent process. Each generates the links
+of a shard of endpoints, with definitions of their own, and returns them as plain data along with their OpenAPI
+operations, which the parent merges back in endpoint order.
+"""
+import sys
+from collections import OrderedDict
+
+from django.db import connections
+
+from drf_openapi.link_cache import get_class_path
+
+# Shards per worker, so that workers given cheaper endpoints take over the shards of others
+SHARDS_PER_WORKER = 4
+
+# Generator and view endpoints of the build in progress, inherited by forked workers
+_build = None
+
+
+def is_available():
+    """Whether workers can be forked, and initialized, which process pools only support from Python 3.7"""
+    import multiprocessing
+    return sys.version_info >= (3, 7) and 'fork' in multiprocessing.get_all_start_methods()
+
+
+def generate_links(generator, view_endpoints, workers, compact=False):
+    """
+    Return the link data, definitions and definition sources of every view endpoint, in order
+    """
+    # Only pulled in by parallel builds, as they are slow to import
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _build
+    count = len(view_endpoints)
+    size = max(1, -(-count // (workers * SHARDS_PER_WORKER)))
+    shards = [range(start, min(start + size, count)) for start in range(0, count, size)]
+
+    _build = (generator, view_endpoints)
+    try:
+        with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('fork'), initializer=_init_worker) as pool:
+            futures = [pool.submit(_generate_shard, shard, compact) for shard in shards]
+            return [result for future in futures for result in future.result()]
+    finally:
+        _build = None
+
+
+def _init_worker():
+    # Never share the database sockets of the parent, workers open their own if they need one
+    for connection in connections.all():
+        connection.connection = None
+
+
+def _generate_shard(indexes, compact):
+    from drf_openapi.codec import _get_link_operation
+
+    generator, view_endpoints = _build
+    results = []
+    # Definitions already returned with a previous link of the shard, which the parent merges first
+    returned = {}
+    for index in indexes:
+        path, method, callback, view = view_endpoints[index]
+        generator.definitions, generator._definition_names = OrderedDict(), {}
+        link = generator.get_link(path, method, view, version=generator.version)
+        sources = {name: get_class_path(cls) for cls, name in generator._definition_names.items()}
+        definitions = OrderedDict(
+            (name, definition) for name, definition in generator.definitions.items()
+            if returned.get(name) != (sources[name], definition)
+        )
+        returned.update((name, (sources[name], definition)) for name, definition in definitions.items())
+        data = {
+            'url': link.url,
+            'action': link.action,
+            'encoding': link.encoding,
+            'description': link.description,
+            'fields': list(link.fields),
+            'response_schema': link.response_schema,
+            'error_status_codes': link.error_status_codes,
+            'operation': _get_link_operation(link, compact),
+        }
+        results.append((data, definitions, sources))
+    return results
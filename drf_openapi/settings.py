@@ -0,0 +1,97 @@
+# coding=utf-8
+"""Settings for DRF OpenAPI are namespaced in the ``DRF_OPENAPI`` setting, for example
+
+    DRF_OPENAPI = {
+        'SCHEMA_CACHE_TIMEOUT': 300,
+        'DEPLOY_FINGERPRINT': os.environ.get('GIT_SHA', ''),
+    }
+"""
+from django.conf import settings
+from django.core.signals import setting_changed
+
+DEFAULTS = {
+    # Seconds a generated schema is kept in the process-wide schema cache.
+    # ``0`` disables caching, ``None`` keeps schemas until they are invalidated.
+    'SCHEMA_CACHE_TIMEOUT': 0,
+    # Schemas, and links of versions, kept in the process-wide schema cache at most. ``None`` does not bound it.
+    'SCHEMA_CACHE_MAX_ENTRIES': 100,
+    # An identifier of the running deploy, e.g. a git sha, folded into schema cache keys
+    'DEPLOY_FINGERPRINT': '',
+    # Directory of schemas pre-generated by the ``generate_openapi_schema`` command.
+    # When set, ``SchemaView`` serves OpenAPI documents from there instead of generating them.
+    'SCHEMA_STATIC_DIR': None,
+    # Stream OpenAPI documents operation by operation when they are not cached
+    'SCHEMA_STREAMING': False,
+    # Report the time spent building and encoding schemas in a ``Server-Timing`` response header
+    'SCHEMA_SERVER_TIMING': False,
+    # Cache the link of each endpoint and regenerate only the endpoints whose code changed.
+    # ``None`` enables it when ``DEBUG`` is on.
+    'SCHEMA_LINK_CACHE': None,
+    # File persisting the link cache across restarts of the development server
+    'SCHEMA_LINK_CACHE_FILE': None,
+    # Library encoding OpenAPI documents: ``json``, ``orjson``, ``ujson`` or ``auto`` for the fastest one installed.
+    # Libraries other than ``json`` emit minified JSON.
+    'JSON_ENCODER': 'auto',
+    # Alias of a Django cache storing encoded OpenAPI documents for every process using it,
+    # with the timeout of ``SCHEMA_CACHE_TIMEOUT``
+    'SCHEMA_SHARED_CACHE': None,
+    # Processes generating the links of endpoints in parallel, for offline builds and warm-ups of large APIs.
+    # ``0`` generates them sequentially.
+    'SCHEMA_PARALLEL_WORKERS': 0,
+    # Content codings of the compressed copies of cached schemas, in order of preference.
+    # ``br`` requires the ``brotli`` package. Each copy is compressed once per cached schema.
+    'SCHEMA_COMPRESSION': ('br', 'gzip'),
+    # Versions whose schemas are generated when Django starts, before any request needs them
+    'SCHEMA_WARMUP_VERSIONS': (),
+    # Schema view, or its dotted path, whose schemas are warmed up
+    'SCHEMA_WARMUP_VIEW': 'drf_openapi.views.SchemaView',
+    # Warm up in a background thread instead of delaying the startup
+    'SCHEMA_WARMUP_BACKGROUND': False,
+    # Management commands serving requests, which warm up schemas. Other commands never do, e.g. ``migrate``.
+    'SCHEMA_WARMUP_COMMANDS': ('runserver',),
+    # Seconds an expired schema is still served while it is regenerated in the background, ``0`` disables it
+    'SCHEMA_STALE_TIMEOUT': 0,
+    # Threads regenerating expired schemas in the background
+    'SCHEMA_REFRESH_WORKERS': 1,
+    # Drop empty descriptions and summaries repeating the URL from OpenAPI documents and minify them
+    'SCHEMA_COMPACT': False,
+}
+
+
+class OpenApiSettings:
+    def __init__(self, user_settings=None, defaults=None):
+        self._user_settings = user_settings
+        self.defaults = defaults or DEFAULTS
+        self._cached_attrs = set()
+
+    @property
+    def user_settings(self):
+        if self._user_settings is None:
+            self._user_settings = getattr(settings, 'DRF_OPENAPI', {})
+        return self._user_settings
+
+    def __getattr__(self, attr):
+        if attr not in self.defaults:
+            raise AttributeError("Invalid DRF OpenAPI setting: '%s'" % attr)
+
+        value = self.user_settings.get(attr, self.defaults[attr])
+        self._cached_attrs.add(attr)
+        setattr(self, attr, value)
+        return value
+
+    def reload(self):
+        for attr in self._cached_attrs:
+            delattr(self, attr)
+        self._cached_attrs.clear()
+        self._user_settings = None
+
+
+openapi_settings = OpenApiSettings(None, DEFAULTS)
+
+
+def reload_openapi_settings(*args, **kwargs):
+    if kwargs['setting'] == 'DRF_OPENAPI':
+        openapi_settings.reload()
+
+
+setting_changed.connect(reload_openapi_settings)
@@ -0,0 +1,8 @@
+# coding=utf-8
+from django.dispatch import Signal
+
+# Sent by `OpenApiSchemaGenerator.get_schema` with ``generator`` and ``stats``, a `SchemaBuildStats`
+schema_generated = Signal()
+
+# Sent by `OpenAPICodec.encode` with ``document`` and ``stats``, a `SchemaBuildStats`
+schema_encoded = Signal()
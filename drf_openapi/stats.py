@@ -0,0 +1,37 @@
+# coding=utf-8
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+
+class SchemaBuildStats:
+    """Time spent in each phase of a schema build along with counters of the work done.
+
+    Phases are ``endpoints`` (enumeration), ``create_view``, ``permissions``, ``get_link`` and ``encode``.
+    Counters are ``endpoints``, ``serializers_instantiated``, ``links`` and ``bytes_encoded``.
+    """
+
+    def __init__(self):
+        self.timings = OrderedDict()
+        self.counters = Counter()
+
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = self.timings.get(phase, 0) + time.perf_counter() - start
+
+    def count(self, counter, value=1):
+        self.counters[counter] += value
+
+    def as_server_timing(self):
+        """Format the timings as a `Server-Timing` header value, in milliseconds"""
+        return ', '.join('{};dur={:.1f}'.format(phase, seconds * 1000) for phase, seconds in self.timings.items())
+
+    def __str__(self):
+        return ', '.join(
+            ['{}={:.1f}ms'.format(phase, seconds * 1000) for phase, seconds in self.timings.items()] +
+            ['{}={}'.format(counter, value) for counter, value in sorted(self.counters.items())]
+        )
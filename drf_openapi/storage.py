@@ -0,0 +1,71 @@
+# coding=utf-8
+"""Pre-generated schema artifacts on disk, written by the ``generate_openapi_schema`` command,
+and the compression of encoded schemas"""
+import gzip
+import io
+import os
+from importlib.util import find_spec
+
+from drf_openapi.settings import openapi_settings
+
+
+def get_schema_path(version, directory=None, encoding=None):
+    """Return the path of the artifact of ``version``, compressed with ``encoding`` if given"""
+    directory = directory or openapi_settings.SCHEMA_STATIC_DIR
+    filename = '{}.json'.format(version)
+    if os.path.basename(filename) != filename or filename.startswith('.'):
+        raise ValueError('Invalid schema version {}'.format(version))
+    if encoding in COMPRESSED_EXTENSIONS:
+        filename += COMPRESSED_EXTENSIONS[encoding]
+    return os.path.join(directory, filename)
+
+
+def gzip_compress(content):
+    buf = io.BytesIO()
+    # mtime=0 keeps the output reproducible across builds
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(content)
+    return buf.getvalue()
+
+
+def brotli_compress(content):
+    import brotli
+    # Much faster than the default quality 11 for a slightly larger output, schemas may be compressed at request time
+    return brotli.compress(content, quality=9)
+
+
+COMPRESSORS = {'br': brotli_compress, 'gzip': gzip_compress}
+COMPRESSED_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def get_compressor(encoding):
+    """Return the function compressing content with the content coding, or ``None`` if it is not available"""
+    if encoding == 'br' and find_spec('brotli') is None:
+        return None
+    return COMPRESSORS.get(encoding)
+
+
+def get_compression_encodings():
+    """Return the available content codings of ``SCHEMA_COMPRESSION``, in order of preference"""
+    return [encoding for encoding in openapi_settings.SCHEMA_COMPRESSION if get_compressor(encoding) is not None]
+
+
+def _write_atomic(path, content):
+    tmp_path = '{}.tmp{}'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.rename(tmp_path, path)
+
+
+def write_schema(version, content, directory=None, compress=True):
+    """Write the encoded schema of ``version`` along with its gzip and, if available, brotli copies,
+    returning the paths written"""
+    paths = [get_schema_path(version, directory)]
+    _write_atomic(paths[0], content)
+    if compress:
+        for encoding in ('gzip', 'br'):
+            compressor = get_compressor(encoding)
+            if compressor is not None:
+                paths.append(get_schema_path(version, directory, encoding))
+                _write_atomic(paths[-1], compressor(content))
+    return paths
@@ -1,12 +1,43 @@
 from functools import wraps
+from itertools import count
 
 from typing import Callable
 
 from drf_openapi.entities import VersionedSerializers
+from drf_openapi.validation import get_response_validator
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 
-def view_config(request_serializer=None, response_serializer=None, validate_response=False):
+def view_config(request_serializer=None, response_serializer=None, validate_response=False,
+                validation_sample_rate=None, on_invalid_response=None):
+    """
+    By default ``validate_response`` runs the response serializer's validation on every response
+    and returns the validated data.
+
+    Setting ``validation_sample_rate`` or ``on_invalid_response`` instead validates the response data against
+    the OpenAPI schema of the response serializer, compiled once per serializer:
+    - ``validation_sample_rate`` is the fraction of requests validated, counted per version, in (0, 1]
+      (1 validates all)
+    - ``on_invalid_response(request, response, errors)`` is called with the list of violations;
+      without it a ``ValidationError`` is raised
+    The response is returned unchanged.
+    """
+    schema_validation = validation_sample_rate is not None or on_invalid_response is not None
+    if validation_sample_rate is None:
+        validation_sample_rate = 1
+    if not 0 < validation_sample_rate <= 1:
+        raise ValueError('validation_sample_rate must be in (0, 1], got {!r}'.format(validation_sample_rate))
+    request_counters = {}
+
+    def should_validate(version):
+        counter = request_counters.get(version)
+        if counter is None:
+            counter = request_counters.setdefault(version, count())
+        # Validate the requests completing another whole number of the rate, e.g. 3 in 5 for 0.6
+        index = next(counter)
+        return int((index + 1) * validation_sample_rate) > int(index * validation_sample_rate)
+
     def decorator(view_method):
 
         view_method.request_serializer = request_serializer
@@ -25,6 +56,11 @@ def view_config(request_serializer=None, response_serializer=None, validate_resp
                 instance.response_serializer = response_serializer
 
             response = view_method(instance, request, version=version, *args, **kwargs)
+            if validate_response and schema_validation:
+                if should_validate(version):
+                    validate_response_schema(instance.response_serializer, request, response, on_invalid_response)
+                return response
+
             if validate_response:
                 response_validator = instance.response_serializer(data=response.data)
                 response_validator.is_valid(raise_exception=True)
@@ -36,3 +72,12 @@ def view_config(request_serializer=None, response_serializer=None, validate_resp
     decorator.__annotations__ = {'view_method': Callable, 'return': Callable}
     return decorator
 view_config.__annotations__ = {'return': Callable}
+
+
+def validate_response_schema(response_serializer, request, response, on_invalid_response=None):
+    errors = get_response_validator(response_serializer)(response.data)
+    if not errors:
+        return
+    if on_invalid_response is None:
+        raise ValidationError(errors)
+    on_invalid_response(request, response, errors)
@@ -0,0 +1,141 @@
+# coding=utf-8
+"""Validation of response data against the OpenAPI schema generated from a serializer.
+
+The schema is compiled once per serializer into nested validator functions, which is much cheaper than running
+the serializer's field-by-field validation on every response.
+"""
+from decimal import Decimal, InvalidOperation
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+from drf_openapi.entities import OpenApiSchemaGenerator
+
+_validators = WeakKeyDictionary()
+_validators_lock = Lock()
+
+
+def get_response_validator(serializer_class):
+    """
+    Return a function validating response data against the schema of the serializer, compiled once per class.
+    The function returns a list of error messages, empty if the data is valid.
+    Lists are validated item by item, for responses of many instances.
+    """
+    with _validators_lock:
+        validator = _validators.get(serializer_class)
+        if validator is None:
+            generator = OpenApiSchemaGenerator(version=None)
+            definition = generator.get_definition(serializer_class) or {}
+            validator = _validators[serializer_class] = SchemaCompiler(generator.definitions).compile(definition)
+
+    def validate(data):
+        errors = []
+        if isinstance(data, (list, tuple)):
+            for index, item in enumerate(data):
+                validator(item, '[{}]'.format(index), errors)
+        else:
+            validator(data, '', errors)
+        return errors
+    return validate
+
+
+class SchemaCompiler:
+    """Compiles the subset of OpenAPI schemas produced by `OpenApiSchemaGenerator` into validator functions.
+
+    Validators are called with ``(value, path, errors)`` and append an error message to ``errors`` for every
+    violation. ``None`` is accepted everywhere because serializer schemas do not describe nullability, and
+    ``string`` accepts any value because it is the fallback type of fields the generator cannot inspect, such as
+    ``SerializerMethodField`` and ``ReadOnlyField``, which may return anything.
+    """
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        self.compiled_definitions = {}
+
+    def compile(self, schema):
+        ref = schema.get('$ref')
+        if ref:
+            return self.compile_ref(ref[len('#/definitions/'):])
+
+        schema_type = schema.get('type')
+        if schema_type == 'object':
+            return self.compile_object(schema)
+        if schema_type == 'array':
+            return self.compile_array(schema)
+        return SCALAR_VALIDATORS.get(schema_type, _validate_any)
+
+    def compile_ref(self, name):
+        if name not in self.compiled_definitions:
+            # Resolved lazily so that recursive definitions compile
+            self.compiled_definitions[name] = None
+            self.compiled_definitions[name] = self.compile(self.definitions.get(name, {}))
+
+        def validate_ref(value, path, errors):
+            self.compiled_definitions[name](value, path, errors)
+        return validate_ref
+
+    def compile_object(self, schema):
+        properties = [
+            (name, self.compile(prop)) for name, prop in schema.get('properties', {}).items()
+        ]
+        required = schema.get('required', [])
+
+        def validate_object(value, path, errors):
+            if value is None:
+                return
+            if not isinstance(value, dict):
+                errors.append('{}: expected object, got {}'.format(path or '.', type(value).__name__))
+                return
+            for name in required:
+                if name not in value:
+                    errors.append('{}.{}: missing required property'.format(path, name))
+            for name, validator in properties:
+                if name in value:
+                    validator(value[name], '{}.{}'.format(path, name), errors)
+        return validate_object
+
+    def compile_array(self, schema):
+        items = self.compile(schema.get('items', {}))
+
+        def validate_array(value, path, errors):
+            if value is None:
+                return
+            if not isinstance(value, (list, tuple)):
+                errors.append('{}: expected array, got {}'.format(path or '.', type(value).__name__))
+                return
+            for index, item in enumerate(value):
+                items(item, '{}[{}]'.format(path, index), errors)
+        return validate_array
+
+
+def _scalar_validator(type_name, check):
+    def validate_scalar(value, path, errors):
+        if value is not None and not check(value):
+            errors.append('{}: expected {}, got {}'.format(path or '.', type_name, type(value).__name__))
+    return validate_scalar
+
+
+def _is_number(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float, Decimal)):
+        return True
+    # Decimal fields are rendered as strings by default
+    if isinstance(value, str):
+        try:
+            Decimal(value)
+        except InvalidOperation:
+            return False
+        return True
+    return False
+
+
+def _validate_any(value, path, errors):
+    pass
+
+
+SCALAR_VALIDATORS = {
+    'string': _validate_any,
+    'integer': _scalar_validator('integer', lambda value: isinstance(value, int) and not isinstance(value, bool)),
+    'number': _scalar_validator('number', _is_number),
+    'boolean': _scalar_validator('boolean', lambda value: isinstance(value, bool)),
+}
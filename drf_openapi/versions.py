@@ -0,0 +1,69 @@
+# coding=utf-8
+"""Parsing of API versions into comparable keys, ordered like PEP 440 versions.
+
+A lightweight replacement of ``pkg_resources.parse_version``, which is slow to import.
+"""
+import re
+
+VERSION_RE = re.compile(r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?:[-_.]?(?P<pre_label>a|b|c|rc|alpha|beta|pre|preview)[-_.]?(?P<pre>[0-9]+)?)?
+    (?:-(?P<post_implicit>[0-9]+)|[-_.]?(?P<post_label>post|rev|r)[-_.]?(?P<post>[0-9]+)?)?
+    (?:[-_.]?(?P<dev_label>dev)[-_.]?(?P<dev>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+""", re.VERBOSE | re.IGNORECASE)
+
+PRE_RELEASES = {'a': 0, 'alpha': 0, 'b': 1, 'beta': 1, 'c': 2, 'rc': 2, 'pre': 2, 'preview': 2}
+
+# Sort before and after any other value of the same position
+_BEFORE = (-1,)
+_AFTER = (1,)
+
+
+def parse_version(version):
+    """
+    Return a key comparing versions as PEP 440 does, e.g. ``1.0 == 1.0.0 < 1.1.dev1 < 1.1a1 < 1.1 < 1.1.post1``.
+    Versions that are not PEP 440 compliant sort before all others, by their dot separated parts.
+    """
+    match = VERSION_RE.match(str(version))
+    if match is None:
+        parts = re.split(r'[.\-_]', str(version).strip().lower())
+        return (-1, tuple((0, int(part), '') if part.isdigit() else (1, 0, part) for part in parts))
+
+    release = [int(part) for part in match.group('release').split('.')]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+
+    pre_label, post_label, dev_label = match.group('pre_label', 'post_label', 'dev_label')
+    post = match.group('post_implicit')
+    if post is None and post_label:
+        post = match.group('post') or 0
+
+    if pre_label:
+        pre = (0, PRE_RELEASES[pre_label.lower()], int(match.group('pre') or 0))
+    elif dev_label and post is None:
+        # 1.0.dev1 is earlier than 1.0a1
+        pre = _BEFORE
+    else:
+        pre = _AFTER
+
+    return (
+        int(match.group('epoch') or 0),
+        tuple(release),
+        pre,
+        _BEFORE if post is None else (0, int(post)),
+        (0, int(match.group('dev') or 0)) if dev_label else _AFTER,
+        _get_local_key(match.group('local')),
+    )
+
+
+def _get_local_key(local):
+    if local is None:
+        return ()
+    return tuple(
+        (1, int(part), '') if part.isdigit() else (0, 0, part)
+        for part in re.split(r'[-_.]', local.lower())
+    )
@@ -1,22 +1,330 @@
 # coding=utf-8
+import logging
+import os
+import re
+
+from django.db import connections
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
 from rest_framework import response, permissions
 from rest_framework.renderers import CoreJSONRenderer
 from rest_framework.views import APIView
 
-from drf_openapi.codec import OpenAPIRenderer, SwaggerUIRenderer
+from drf_openapi.cache import SchemaCacheEntry, schema_cache, get_schema_fingerprint, get_shared_schema_cache
 from drf_openapi.entities import OpenApiSchemaGenerator
+from drf_openapi.settings import openapi_settings
+from drf_openapi.storage import get_schema_path, get_compression_encodings
+
+logger = logging.getLogger(__name__)
+
+quality_re = re.compile(r'^\s*q\s*=\s*([0-9.]+)\s*$', re.IGNORECASE)
+
+
+def set_validators(schema_response, etag, last_modified):
+    schema_response['ETag'] = etag
+    schema_response['Last-Modified'] = http_date(last_modified)
+
+
+def get_accepted_encodings(request, encodings):
+    """
+    Return the content codings of ``encodings`` the request accepts, by decreasing quality value of the request,
+    then in the order of ``encodings`` for codings of the same quality
+    """
+    qualities = {}
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = coding.partition(';')
+        match = quality_re.match(params)
+        try:
+            qualities[coding.strip().lower()] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            continue
+    default = qualities.get('*', 0)
+    accepted = [encoding for encoding in encodings if qualities.get(encoding, default) > 0]
+    # Sorting is stable, so the preference of the server breaks ties
+    return sorted(accepted, key=lambda encoding: -qualities.get(encoding, default))
+
+
+def get_encoded_response(request, content, etag, last_modified, encoding=None):
+    """Return a response of the encoded OpenAPI document, or `304 Not Modified` if the client has it"""
+    from drf_openapi.codec import OpenAPIRenderer
+
+    schema_response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if schema_response is None:
+        schema_response = HttpResponse(content, content_type=OpenAPIRenderer.media_type)
+        if encoding:
+            schema_response['Content-Encoding'] = encoding
+    set_validators(schema_response, etag, last_modified)
+    return schema_response
+
+
+class DefaultRendererClasses:
+    """Imports the renderers of `SchemaView` on first use, as the codec pulls in the whole rendering stack"""
+
+    def __get__(self, instance, owner):
+        from drf_openapi.codec import OpenAPIRenderer, SwaggerUIRenderer
+        return (CoreJSONRenderer, SwaggerUIRenderer, OpenAPIRenderer)
 
 
 class SchemaView(APIView):
-    renderer_classes = (CoreJSONRenderer, SwaggerUIRenderer, OpenAPIRenderer)
+    renderer_classes = DefaultRendererClasses()
     permission_classes = (permissions.IsAdminUser,)
     url = ''
     title = 'API Documentation'
+    public = False
 
     def get(self, request, version):
-        generator = OpenApiSchemaGenerator(
+        from drf_openapi.codec import OpenAPIRenderer
+
+        # Pre-generated schemas list every endpoint, only public views may serve them
+        static = self.public and openapi_settings.SCHEMA_STATIC_DIR
+        if static and isinstance(request.accepted_renderer, OpenAPIRenderer):
+            static_response = self.get_static_response(request, version)
+            if static_response is not None:
+                return static_response
+
+        shared_cache = get_shared_schema_cache()
+        generator = key = None
+        if shared_cache is not None and isinstance(request.accepted_renderer, OpenAPIRenderer):
+            generator = self.get_cache_generator(request, version)
+            key = self.get_schema_cache_key(request, version, generator)
+            # Schemas this process has are served as is, the shared cache is only fetched from on a local miss
+            if schema_cache.get(key) is None:
+                shared_response = self.get_shared_response(request, version, shared_cache, generator, key)
+                if shared_response is not None:
+                    return shared_response
+
+        self.schema_entry = entry = self.get_schema_entry(request, version, generator, key)
+        if entry.document is None or not isinstance(request.accepted_renderer, OpenAPIRenderer):
+            return self.set_server_timing(response.Response(entry.document))
+
+        if openapi_settings.SCHEMA_STREAMING and openapi_settings.SCHEMA_CACHE_TIMEOUT == 0:
+            # Nothing keeps the encoded document around, so never hold all of it in memory
+            return self.set_server_timing(StreamingHttpResponse(
+                request.accepted_renderer.iter_encode(entry.document, stats=self.schema_stats),
+                content_type=OpenAPIRenderer.media_type
+            ))
+
+        # Encode upfront so that conditional requests are answered from the ETag of the content
+        entry.get_encoded(lambda document: request.accepted_renderer.encode(document, stats=self.schema_stats))
+        # Cached schemas keep their compressed copies, there is no point in compressing the others upfront
+        encodings = get_compression_encodings() if openapi_settings.SCHEMA_CACHE_TIMEOUT != 0 else []
+        accepted = get_accepted_encodings(request, encodings)
+        if accepted:
+            content, etag = entry.get_compressed(accepted[0])
+            schema_response = get_encoded_response(request, content, etag, entry.last_modified, accepted[0])
+        else:
+            schema_response = get_conditional_response(request, etag=entry.etag, last_modified=entry.last_modified)
+            if schema_response is None:
+                schema_response = response.Response(entry.document)
+            set_validators(schema_response, entry.etag, entry.last_modified)
+        if encodings:
+            patch_vary_headers(schema_response, ('Accept-Encoding',))
+        return self.set_server_timing(schema_response)
+
+    def set_server_timing(self, schema_response):
+        if openapi_settings.SCHEMA_SERVER_TIMING:
+            timings = [self.schema_stats.as_server_timing()]
+            if openapi_settings.SCHEMA_CACHE_TIMEOUT != 0:
+                timings.append('cache;desc={}'.format(self.schema_cache_status))
+            schema_response['Server-Timing'] = ', '.join(timing for timing in timings if timing)
+        return schema_response
+
+    def get_shared_response(self, request, version, shared_cache, generator, key):
+        """Serve the encoded schema from the cache shared by processes, generating it if no process did yet"""
+        encodings = get_compression_encodings()
+
+        def generate():
+            self.schema_entry = entry = self.get_schema_entry(request, version, generator, key)
+            # Stale schemas are served by this process only, until it regenerated them
+            if entry.document is None or self.schema_cache_status == 'stale':
+                return None
+            encoded = entry.get_encoded(
+                lambda document: request.accepted_renderer.encode(document, stats=self.schema_stats))
+            return {
+                'content': encoded,
+                'etag': entry.etag,
+                'last_modified': entry.last_modified,
+                'compressed': {encoding: entry.get_compressed(encoding) for encoding in encodings},
+            }
+
+        self.schema_stats = generator.stats
+        value, status = shared_cache.get_or_set(key, generate, openapi_settings.SCHEMA_CACHE_TIMEOUT)
+        if value is None:
+            return None
+        if status == 'hit':
+            self.schema_cache_status = 'shared'
+
+        compressed = value.get('compressed', {})
+        accepted = get_accepted_encodings(request, [encoding for encoding in encodings if encoding in compressed])
+        if accepted:
+            content, etag = compressed[accepted[0]]
+            schema_response = get_encoded_response(request, content, etag, value['last_modified'], accepted[0])
+        else:
+            schema_response = get_encoded_response(request, value['content'], value['etag'], value['last_modified'])
+        if encodings:
+            patch_vary_headers(schema_response, ('Accept-Encoding',))
+        return self.set_server_timing(schema_response)
+
+    def get_static_response(self, request, version):
+        """Serve the schema pre-generated by ``generate_openapi_schema``, preferring its compressed copies"""
+        from drf_openapi.codec import OpenAPIRenderer
+
+        for encoding in get_accepted_encodings(request, ('br', 'gzip')) + [None]:
+            try:
+                path = get_schema_path(version, encoding=encoding)
+            except ValueError:
+                return None
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                etag = '"{:x}-{:x}"'.format(int(stat.st_mtime), stat.st_size)
+                last_modified = int(stat.st_mtime)
+                static_response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if static_response is None:
+                    static_response = FileResponse(open(path, 'rb'), content_type=OpenAPIRenderer.media_type)
+                    if encoding:
+                        static_response['Content-Encoding'] = encoding
+                set_validators(static_response, etag, last_modified)
+                patch_vary_headers(static_response, ('Accept-Encoding',))
+                return static_response
+        return None
+
+    def get_generator(self, version):
+        return OpenApiSchemaGenerator(
             version=version,
             url=self.url,
             title=self.title
         )
-        return response.Response(generator.get_schema(request))
+
+    def get_schema_url(self, request):
+        # Only the scheme and host of the URL end up in OpenAPI documents, requests of any path and query share them
+        return self.url or request.build_absolute_uri('/')
+
+    def get_schema_cache_key(self, request, version, generator):
+        # Users granted the same endpoints share a schema
+        permissions = None if self.public else generator.get_permission_fingerprint(request)
+        return (
+            version,
+            self.public,
+            self.title,
+            self.get_schema_url(request),
+            permissions,
+            get_schema_fingerprint(),
+        )
+
+    def get_cache_generator(self, request, version):
+        """
+        Return a generator of the version sharing the links of its endpoints when they are cached already.
+        Otherwise links are only generated along with the schema, on a miss of every cache.
+        """
+        generator = self.get_generator(version)
+        generator.url = generator.url or self.get_schema_url(request)
+        entry = schema_cache.get(self.get_endpoint_links_key(generator))
+        if entry is not None:
+            generator.endpoint_links, generator.definitions = entry.document
+        return generator
+
+    def generate_schema(self, request, generator):
+        """Generate the schema with the cached links of its version, generating them first if needed"""
+        if generator.endpoint_links is None:
+            self.load_endpoint_links(
+                generator, openapi_settings.SCHEMA_CACHE_TIMEOUT, openapi_settings.SCHEMA_STALE_TIMEOUT)
+        return generator.get_schema(request, public=self.public)
+
+    def get_schema_entry(self, request, version, generator=None, key=None):
+        """
+        Return the cached schema of the requested version, generating it on a cache miss.
+        ``generator`` and ``key`` are those of `get_cache_generator` and `get_schema_cache_key`, if already known.
+        """
+        timeout = openapi_settings.SCHEMA_CACHE_TIMEOUT
+        if timeout == 0:
+            generator = self.get_generator(version)
+            self.schema_stats = generator.stats
+            return SchemaCacheEntry(generator.get_schema(request, public=self.public))
+
+        if generator is None:
+            generator = self.get_cache_generator(request, version)
+            key = self.get_schema_cache_key(request, version, generator)
+        self.schema_stats = generator.stats
+        # Concurrent requests for the same schema wait for a single build
+        entry, self.schema_cache_status = schema_cache.get_or_set(
+            key, lambda: self.generate_schema(request, generator), timeout,
+            stale=openapi_settings.SCHEMA_STALE_TIMEOUT, refresh=lambda: self.refresh_schema(request, version))
+        return entry
+
+    def refresh_schema(self, request, version):
+        """Generate the schema again, along with the links of its version, once its cache entry expired"""
+        generator = self.get_generator(version)
+        generator.url = generator.url or self.get_schema_url(request)
+        self.load_endpoint_links(
+            generator, openapi_settings.SCHEMA_CACHE_TIMEOUT, openapi_settings.SCHEMA_STALE_TIMEOUT, serve_stale=False)
+        return generator.get_schema(request, public=self.public)
+
+    def get_endpoint_links_key(self, generator):
+        return generator.version, 'endpoint_links', generator.__class__, get_schema_fingerprint()
+
+    def load_endpoint_links(self, generator, timeout, stale=0, serve_stale=True):
+        """
+        Share the permission-agnostic links of the version, and their definitions, across requests.
+        Expired links are still served to requests, and only regenerated along with the schemas.
+        """
+        entry, _ = schema_cache.get_or_set(
+            self.get_endpoint_links_key(generator),
+            lambda: (generator.get_endpoint_links(), generator.definitions), timeout,
+            stale=stale, serve_stale=serve_stale)
+        generator.endpoint_links, generator.definitions = entry.document
+
+    def warm_up(self, version):
+        """
+        Generate the schema of the version ahead of requests. Links and serializer schemas are kept in the
+        process-wide caches, as is the encoded OpenAPI document of public views with a `url`, which requests share.
+        """
+        from drf_openapi.codec import OpenAPIRenderer
+
+        generator = self.get_generator(version)
+        timeout = openapi_settings.SCHEMA_CACHE_TIMEOUT
+        if timeout == 0:
+            generator.get_endpoint_links()
+            return
+
+        stale = openapi_settings.SCHEMA_STALE_TIMEOUT
+        self.load_endpoint_links(generator, timeout, stale)
+        if not (self.public and self.url):
+            return
+
+        key = self.get_schema_cache_key(None, version, generator)
+        entry, _ = schema_cache.get_or_set(key, lambda: generator.get_schema(public=True), timeout, stale=stale)
+        if entry.document is not None:
+            renderer_class = next(
+                (cls for cls in self.renderer_classes if issubclass(cls, OpenAPIRenderer)), OpenAPIRenderer)
+            entry.get_encoded(renderer_class().encode)
+            for encoding in get_compression_encodings():
+                entry.get_compressed(encoding)
+
+    def get_renderer_context(self):
+        context = super(SchemaView, self).get_renderer_context()
+        context['schema_entry'] = getattr(self, 'schema_entry', None)
+        return context
+
+
+def warm_up_schemas(versions, view_class=None):
+    """
+    Warm up the schemas of the versions with a `SchemaView`, by default the one of ``SCHEMA_WARMUP_VIEW``.
+    Failures are logged, so that they never prevent Django from starting.
+    """
+    if view_class is None:
+        view_class = openapi_settings.SCHEMA_WARMUP_VIEW
+    if isinstance(view_class, str):
+        view_class = import_string(view_class)
+
+    view = view_class()
+    try:
+        for version in versions:
+            try:
+                view.warm_up(version)
+            except Exception:
+                logger.exception('Could not warm up the schema of version %s', version)
+    finally:
+        # Neither the threads serving requests nor the workers forked after a warm-up on startup may share them
+        connections.close_all()
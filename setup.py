@@ -34,7 +34,7 @@ setup(
     author="Lim H.",
     author_email='limdauto@gmail.com',
     url='https://github.com/limdauto/drf_openapi',
-    packages=find_packages(include=['drf_openapi']),
+    packages=find_packages(include=['drf_openapi', 'drf_openapi.*']),
     entry_points={
         'console_scripts': [
             'drf_openapi=drf_openapi.cli:main'
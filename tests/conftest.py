@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import django
+from django.conf import settings
+
+
+def pytest_configure():
+    if not settings.configured:
+        settings.configure(
+            SECRET_KEY='drf_openapi',
+            INSTALLED_APPS=[
+                'django.contrib.auth',
+                'django.contrib.contenttypes',
+                'rest_framework',
+            ],
+            DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        )
+    django.setup()
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""Tests for the concurrent generation of schemas by ``SchemaCache`` and ``SharedSchemaCache``"""
+import threading
+import time
+
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+
+from drf_openapi.cache import SchemaBuild, SchemaCache, SharedSchemaCache, invalidate_schema_cache
+
+KEY = ('1.0', True, 'API', 'http://testserver/', None, 'fingerprint')
+TIMEOUT = 5
+
+
+class Generate(object):
+    """A document generator blocking until ``release()``, counting its calls"""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.started = threading.Event()
+        self.released = threading.Event()
+        self.error = error
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.released.wait(TIMEOUT)
+        if self.error is not None:
+            raise self.error
+        return {'call': self.calls}
+
+    def release(self):
+        self.released.set()
+
+
+@pytest.fixture
+def waiting(monkeypatch):
+    """Count the threads waiting for the build of another thread"""
+    waiting = []
+    wait = SchemaBuild.wait
+
+    def counted_wait(build):
+        waiting.append(build)
+        return wait(build)
+
+    monkeypatch.setattr(SchemaBuild, 'wait', counted_wait)
+    return waiting
+
+
+def wait_until(predicate):
+    deadline = time.time() + TIMEOUT
+    while not predicate():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+def run_threads(target, count):
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as exc:
+            results[index] = exc
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def join(threads):
+    for thread in threads:
+        thread.join(TIMEOUT)
+        assert not thread.is_alive()
+
+
+def test_concurrent_misses_build_once(waiting):
+    schema_cache, generate = SchemaCache(), Generate()
+    builder, _ = run_threads(lambda: schema_cache.get_or_set(KEY, generate), 1)
+    assert generate.started.wait(TIMEOUT)
+
+    threads, results = run_threads(lambda: schema_cache.get_or_set(KEY, generate), 8)
+    wait_until(lambda: len(waiting) == 8)
+    generate.release()
+    join(builder + threads)
+
+    entry, status = schema_cache.get_or_set(KEY, generate)
+    assert status == 'hit'
+    assert generate.calls == 1
+    assert entry.document == {'call': 1}
+    assert all(result == (entry, 'hit') for result in results)
+
+
+def test_build_errors_are_raised_in_every_waiting_thread(waiting):
+    error = ValueError('cannot generate')
+    schema_cache, generate = SchemaCache(), Generate(error)
+    builder, built = run_threads(lambda: schema_cache.get_or_set(KEY, generate), 1)
+    assert generate.started.wait(TIMEOUT)
+    threads, results = run_threads(lambda: schema_cache.get_or_set(KEY, generate), 4)
+    wait_until(lambda: len(waiting) == 4)
+    generate.release()
+    join(builder + threads)
+
+    assert generate.calls == 1
+    assert all(result is error for result in built + results)
+    # Failed builds are not cached, the next call generates the document again
+    assert len(schema_cache) == 0
+    assert schema_cache.get(KEY) is None
+    with pytest.raises(ValueError):
+        schema_cache.get_or_set(KEY, generate)
+    assert generate.calls == 2
+
+
+def test_documents_built_across_an_invalidation_are_not_cached():
+    schema_cache, generate = SchemaCache(), Generate()
+    builder, built = run_threads(lambda: schema_cache.get_or_set(KEY, generate), 1)
+    assert generate.started.wait(TIMEOUT)
+    schema_cache.invalidate()
+    generate.release()
+    join(builder)
+
+    entry, status = built[0]
+    assert status == 'miss'
+    assert entry.document == {'call': 1}
+    assert schema_cache.get(KEY) is None
+
+    entry, status = schema_cache.get_or_set(KEY, generate)
+    assert status == 'miss'
+    assert entry.document == {'call': 2}
+    assert schema_cache.get(KEY) is entry
+
+
+def expire(entry, stale=TIMEOUT):
+    now = time.time()
+    entry.expires = now - 1
+    entry.stale_until = now + stale
+
+
+def test_stale_entries_are_served_while_refreshed_once():
+    schema_cache = SchemaCache()
+    stale_entry, status = schema_cache.get_or_set(KEY, lambda: 'stale', TIMEOUT, TIMEOUT)
+    assert status == 'miss'
+    expire(stale_entry)
+
+    generate = Generate()
+    refreshes = []
+
+    def refresh():
+        refreshes.append(threading.current_thread().name)
+        return generate()
+
+    assert schema_cache.get_or_set(KEY, generate, TIMEOUT, TIMEOUT, refresh=refresh) == (stale_entry, 'stale')
+    assert generate.started.wait(TIMEOUT)
+    # The refresh is running already, the stale entry is served without starting another one
+    assert schema_cache.get_or_set(KEY, generate, TIMEOUT, TIMEOUT, refresh=refresh) == (stale_entry, 'stale')
+    assert schema_cache.get(KEY) is None
+
+    generate.release()
+    wait_until(lambda: schema_cache.get(KEY) is not None)
+    entry, status = schema_cache.get_or_set(KEY, generate, TIMEOUT, TIMEOUT, refresh=refresh)
+    assert status == 'hit'
+    assert entry.document == {'call': 1}
+    assert generate.calls == 1
+    assert len(refreshes) == 1
+    assert refreshes[0].startswith('drf_openapi_refresh')
+
+
+def test_failed_refreshes_keep_serving_the_stale_entry():
+    schema_cache = SchemaCache()
+    stale_entry, _ = schema_cache.get_or_set(KEY, lambda: 'stale', TIMEOUT, TIMEOUT)
+    expire(stale_entry)
+
+    generate = Generate(ValueError('cannot generate'))
+    assert schema_cache.get_or_set(KEY, generate, TIMEOUT, TIMEOUT, refresh=generate) == (stale_entry, 'stale')
+    generate.release()
+    wait_until(lambda: not schema_cache._builds)
+    assert schema_cache.get_or_set(KEY, generate, TIMEOUT, TIMEOUT) == (stale_entry, 'stale')
+
+
+def test_stale_entries_are_not_served_unless_allowed():
+    schema_cache = SchemaCache()
+    stale_entry, _ = schema_cache.get_or_set(KEY, lambda: 'stale', TIMEOUT, TIMEOUT)
+    expire(stale_entry)
+
+    entry, status = schema_cache.get_or_set(KEY, lambda: 'fresh', TIMEOUT, TIMEOUT, serve_stale=False)
+    assert status == 'miss'
+    assert entry.document == 'fresh'
+
+
+def test_dead_entries_are_generated_again():
+    schema_cache = SchemaCache()
+    dead_entry, _ = schema_cache.get_or_set(KEY, lambda: 'dead', TIMEOUT, TIMEOUT)
+    expire(dead_entry, stale=-1)
+
+    entry, status = schema_cache.get_or_set(KEY, lambda: 'fresh', TIMEOUT, TIMEOUT, refresh=lambda: 'refreshed')
+    assert status == 'miss'
+    assert entry.document == 'fresh'
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    caches['default'].clear()
+    shared_cache = SharedSchemaCache('default')
+    monkeypatch.setattr(shared_cache, 'poll_interval', 0.001)
+    yield shared_cache
+    caches['default'].clear()
+
+
+def test_shared_misses_wait_for_the_process_holding_the_lock(shared_cache, monkeypatch):
+    generate = Generate()
+    builder, built = run_threads(lambda: shared_cache.get_or_set(KEY, generate), 1)
+    assert generate.started.wait(TIMEOUT)
+
+    cache_key, polls = shared_cache.make_key(KEY), []
+    get = shared_cache.cache.get
+
+    def counted_get(key, *args, **kwargs):
+        if key == cache_key:
+            polls.append(key)
+        return get(key, *args, **kwargs)
+
+    monkeypatch.setattr(shared_cache.cache, 'get', counted_get)
+    threads, results = run_threads(lambda: shared_cache.get_or_set(KEY, generate), 4)
+    # Every thread reads the document once, then polls it at least once
+    wait_until(lambda: len(polls) >= 8)
+    generate.release()
+    join(builder + threads)
+
+    assert generate.calls == 1
+    assert built == [({'call': 1}, 'miss')]
+    assert results == [({'call': 1}, 'hit')] * 4
+    # The lock is released once the document is stored
+    assert shared_cache.cache.get(shared_cache.make_key(KEY) + ':lock') is None
+
+
+def test_shared_locks_expire_with_their_holder(shared_cache, monkeypatch):
+    monkeypatch.setattr(shared_cache, 'lock_timeout', 0.05)
+    shared_cache.cache.add(shared_cache.make_key(KEY) + ':lock', True, 60)
+
+    assert shared_cache.get_or_set(KEY, lambda: 'document') == ('document', 'miss')
+    # The lock of the presumably dead process is left alone
+    assert shared_cache.cache.get(shared_cache.make_key(KEY) + ':lock') is True
+
+
+def test_shared_documents_are_not_stored_without_content(shared_cache):
+    assert shared_cache.get_or_set(KEY, lambda: None) == (None, 'miss')
+    assert shared_cache.get_or_set(KEY, lambda: 'document') == ('document', 'miss')
+    assert shared_cache.get_or_set(KEY, lambda: 'other') == ('document', 'hit')
+
+
+def test_shared_invalidation(shared_cache):
+    other_key = ('2.0',) + KEY[1:]
+    shared_cache.get_or_set(KEY, lambda: 'document')
+    shared_cache.get_or_set(other_key, lambda: 'other')
+
+    shared_cache.invalidate('1.0')
+    assert shared_cache.get_or_set(KEY, lambda: 'new document') == ('new document', 'miss')
+    assert shared_cache.get_or_set(other_key, lambda: 'new other') == ('other', 'hit')
+
+    shared_cache.invalidate()
+    assert shared_cache.get_or_set(KEY, lambda: 'newer document') == ('newer document', 'miss')
+    assert shared_cache.get_or_set(other_key, lambda: 'new other') == ('new other', 'miss')
+
+
+def test_invalidation_reaches_the_shared_cache_of_every_process(shared_cache):
+    shared_cache.get_or_set(KEY, lambda: 'document')
+    other_process = SharedSchemaCache('default')
+    assert other_process.get_or_set(KEY, lambda: 'other') == ('document', 'hit')
+
+    with override_settings(DRF_OPENAPI={'SCHEMA_SHARED_CACHE': 'default', 'SCHEMA_CACHE_TIMEOUT': 60}):
+        invalidate_schema_cache()
+    assert other_process.get_or_set(KEY, lambda: 'other') == ('other', 'miss')
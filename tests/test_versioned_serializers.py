@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Tests for the resolution of ``VersionedSerializers.VERSION_MAP``"""
+import operator
+import random
+
+import pytest
+
+from drf_openapi.entities import VersionedSerializers
+from drf_openapi.versions import parse_version
+
+
+class V10(object):
+    pass
+
+
+class V13(object):
+    pass
+
+
+class V16(object):
+    pass
+
+
+class V20(object):
+    pass
+
+
+class MeSerializers(VersionedSerializers):
+    VERSION_MAP = (
+        ('1.0', V10),
+        ('>1.0, <=1.3', V13),
+        ('>1.3, <1.6', V16),
+        ('>=1.6, <2.0, <3.0', V20),
+    )
+
+
+def naive_get(version_map, request_version):
+    """Evaluate every constraint of the map in order, without any precompilation"""
+    operators = {
+        '>': operator.gt, '<': operator.lt, '==': operator.eq, '>=': operator.ge, '<=': operator.le,
+    }
+    parsed = parse_version(request_version)
+    for allowed_version, serializer in version_map:
+        matched = True
+        for constraint in allowed_version.split(','):
+            constraint = constraint.strip()
+            symbol = next((symbol for symbol in ('>=', '<=', '==', '>', '<') if constraint.startswith(symbol)), '==')
+            version = constraint[len(symbol):] if constraint.startswith(symbol) else constraint
+            matched = matched and operators[symbol](parsed, parse_version(version.strip()))
+        if matched:
+            return serializer
+    raise ValueError('Invalid request version {}'.format(request_version))
+
+
+@pytest.mark.parametrize('request_version, serializer', [
+    ('1.0', V10),
+    ('1.0.0', V10),
+    ('1.0.1', V13),
+    ('1.3', V13),
+    ('1.3.0.1', V16),
+    ('1.5.99', V16),
+    ('1.6', V20),
+    ('1.6a1', V16),
+    ('1.9', V20),
+])
+def test_comma_separated_constraints_are_all_required(request_version, serializer):
+    assert MeSerializers.get(request_version) is serializer
+
+
+@pytest.mark.parametrize('request_version', ['0.9', '1.0a1', '2.0', '2.5', '3.0', '10'])
+def test_versions_outside_every_constraint_are_invalid(request_version):
+    with pytest.raises(ValueError):
+        MeSerializers.get(request_version)
+
+
+def test_boundaries_and_intervals_between_them():
+    class BoundarySerializers(VersionedSerializers):
+        VERSION_MAP = (
+            ('>=2.0, <3.0', V20),
+            ('<=1.0', V10),
+            ('>1.0, <2.0', V13),
+        )
+
+    compiled = BoundarySerializers.get_compiled_version_map()
+    assert compiled.boundaries == [parse_version('1.0'), parse_version('2.0'), parse_version('3.0')]
+    assert BoundarySerializers.get('0.1') is V10
+    assert BoundarySerializers.get('1.0') is V10
+    assert BoundarySerializers.get('1.0.1') is V13
+    assert BoundarySerializers.get('1.99') is V13
+    assert BoundarySerializers.get('2.0') is V20
+    assert BoundarySerializers.get('2.99') is V20
+    with pytest.raises(ValueError):
+        BoundarySerializers.get('3.0')
+    with pytest.raises(ValueError):
+        BoundarySerializers.get('4.0')
+
+
+def test_first_matching_entry_wins():
+    class OverlappingSerializers(VersionedSerializers):
+        VERSION_MAP = (
+            ('>=1.0, <=2.0', V10),
+            ('>=1.5', V20),
+        )
+
+    assert OverlappingSerializers.get('1.5') is V10
+    assert OverlappingSerializers.get('2.0') is V10
+    assert OverlappingSerializers.get('2.0.1') is V20
+
+
+def test_reassigned_version_map_is_compiled_again():
+    class ReassignedSerializers(VersionedSerializers):
+        VERSION_MAP = (('>=1.0', V10),)
+
+    assert ReassignedSerializers.get('1.5') is V10
+    ReassignedSerializers.VERSION_MAP = (('>=1.0', V20),)
+    assert ReassignedSerializers.get('1.5') is V20
+
+
+def test_compiled_map_agrees_with_naive_evaluation():
+    rng = random.Random(0)
+    versions = ['0.9', '1.0', '1.1', '1.2', '1.5', '2.0', '2.1', '3.0']
+    request_versions = versions + ['0.1', '1.0.1', '1.05', '1.99', '2.0.5', '4.0', '1.1a1', '2.0.post1']
+    symbols = ['', '==', '>', '<', '>=', '<=']
+    serializers = [V10, V13, V16, V20]
+
+    for _ in range(500):
+        version_map = tuple(
+            (
+                ', '.join(rng.choice(symbols) + rng.choice(versions) for _ in range(rng.randint(1, 3))),
+                rng.choice(serializers),
+            )
+            for _ in range(rng.randint(1, 4))
+        )
+        versioned = type('RandomSerializers', (VersionedSerializers,), {'VERSION_MAP': version_map})
+        for request_version in request_versions:
+            try:
+                expected = naive_get(version_map, request_version)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    versioned.get(request_version)
+            else:
+                assert versioned.get(request_version) is expected, (version_map, request_version)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Tests for ``parse_version``, which must order versions as PEP 440 does"""
+import itertools
+import random
+
+import pytest
+
+from drf_openapi.versions import parse_version
+
+packaging_version = pytest.importorskip('packaging.version')
+
+VERSIONS = [
+    '0.9',
+    '1.0.dev0',
+    '1.0.dev1',
+    '1.0a1.dev1',
+    '1.0a1',
+    '1.0a2',
+    '1.0a2.post1.dev1',
+    '1.0a2.post1',
+    '1.0b1',
+    '1.0rc1',
+    '1.0rc1.post1',
+    '1.0',
+    '1.0+abc',
+    '1.0+abc.1',
+    '1.0+1',
+    '1.0+1.abc',
+    '1.0+2',
+    '1.0.post1.dev1',
+    '1.0.post1',
+    '1.0.post1+local',
+    '1.0.post2',
+    '1.0.1',
+    '1.1.dev1',
+    '1.1',
+    '1.10',
+    '2.0',
+    '10.0',
+    '1!0.1',
+    '1!1.0',
+]
+
+
+def test_versions_sort_like_packaging():
+    rng = random.Random(0)
+    shuffled = list(VERSIONS)
+    for _ in range(20):
+        rng.shuffle(shuffled)
+        assert sorted(shuffled, key=parse_version) == sorted(shuffled, key=packaging_version.Version)
+
+
+@pytest.mark.parametrize('left, right', list(itertools.combinations(VERSIONS, 2)))
+def test_comparisons_agree_with_packaging(left, right):
+    expected = packaging_version.Version(left) < packaging_version.Version(right)
+    assert (parse_version(left) < parse_version(right)) is expected
+    assert (parse_version(left) == parse_version(right)) is (
+        packaging_version.Version(left) == packaging_version.Version(right))
+
+
+@pytest.mark.parametrize('left, right', [
+    ('1.0', '1.0.0'),
+    ('1', '1.0.0.0'),
+    ('v1.0', '1.0'),
+    (' 1.0 ', '1.0'),
+    ('1.0alpha1', '1.0a1'),
+    ('1.0-beta.2', '1.0b2'),
+    ('1.0c1', '1.0rc1'),
+    ('1.0pre1', '1.0rc1'),
+    ('1.0a', '1.0a0'),
+    ('1.0-1', '1.0.post1'),
+    ('1.0-r1', '1.0.post1'),
+    ('1.0rev1', '1.0.post1'),
+    ('1.0.post', '1.0.post0'),
+    ('1.0-dev2', '1.0.dev2'),
+    ('1.0.dev', '1.0.dev0'),
+    ('1.0RC1', '1.0rc1'),
+    ('1.0+ABC', '1.0+abc'),
+    ('1.0+abc-1', '1.0+abc.1'),
+    ('0!1.0', '1.0'),
+])
+def test_equivalent_spellings(left, right):
+    assert parse_version(left) == parse_version(right)
+    assert packaging_version.Version(left) == packaging_version.Version(right)
+
+
+def test_non_compliant_versions_sort_before_compliant_ones():
+    legacy = ['latest', 'foo', '1.0-foo', 'beta']
+    for version in legacy:
+        with pytest.raises(packaging_version.InvalidVersion):
+            packaging_version.Version(version)
+        assert parse_version(version) < parse_version('0')
+        assert parse_version(version) < parse_version('0.0.dev0')
+
+
+def test_non_compliant_versions_sort_by_their_parts():
+    assert parse_version('1.0-foo') == parse_version('1.0.foo')
+    assert parse_version('1.0-foo') == parse_version('1_0_FOO')
+    assert sorted(['2.foo', '10.foo', '1.foo.2', '1.foo', 'foo', '1.bar'], key=parse_version) == [
+        '1.bar', '1.foo', '1.foo.2', '2.foo', '10.foo', 'foo',
+    ]
+    # Numeric parts sort before the others
+    assert parse_version('x.1') < parse_version('x.a')